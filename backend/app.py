@@ -1,21 +1,90 @@
 import csv
-from collections import defaultdict
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date
 from pathlib import Path
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 
+import formats
+import metrics
+import profiling
+from columnar import CATEGORY, DATE, INT, NULL, STR, Bitmap, ColumnTable, find_rows, map_column
+from compute import ComputePool, ComputeUnavailable
+from keyindex import KeyIndex
+from scan import ScanEngine
+from sqlstore import SqlStore
+from pivot import Cube
+from stats import RunningStats
+from suggest import NameIndex
+from timeseries import CALENDAR_BUCKETS, PrefixSeries, period_buckets
+
 # -----------------------------------------------------------------------------
 # Paths & in-memory "tables"
 # -----------------------------------------------------------------------------
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATA_DIR = BASE_DIR / "datasets" / "clean"
+DATA_DIR = Path(os.environ.get("API_DATA_DIR") or BASE_DIR / "datasets" / "clean")
+
+
+# -----------------------------------------------------------------------------
+# Config (environment variables)
+# -----------------------------------------------------------------------------
+def env_flag(name: str, default: bool = False) -> bool:
+    val = os.environ.get(name)
+    if val is None or val == "":
+        return default
+    return val.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# Allow ?profile=1 / "X-Profile: 1" to run a request under cProfile
+PROFILING_ENABLED = env_flag("API_PROFILING")
+# Requests slower than this are logged with a compact summary (0 = off)
+SLOW_REQUEST_MS = env_float("API_SLOW_REQUEST_MS", 0)
+# Profile every request so slow outliers can be logged with their hot spots
+SLOW_REQUEST_PROFILE = env_flag("API_SLOW_REQUEST_PROFILE")
+
+# Heavy aggregations run on a bounded pool; identical concurrent calls share one run
+COMPUTE_WORKERS = env_int("API_COMPUTE_WORKERS", 4)
+COMPUTE_QUEUE = env_int("API_COMPUTE_QUEUE", 32)
+COMPUTE_TIMEOUT = env_float("API_COMPUTE_TIMEOUT", 30)
+
+# Processes used to scan fact_attendance in parallel (1 = scan in-process)
+SCAN_WORKERS = env_int("API_SCAN_WORKERS", os.cpu_count() or 1)
+
+# Load tables in a background thread so small ones can serve right away
+BACKGROUND_LOAD = env_flag("API_BACKGROUND_LOAD", True)
+# How long a request waits for a table that is still loading before a 503
+TABLE_WAIT_SECONDS = env_float("API_TABLE_WAIT_SECONDS", 5)
+
+# "memory" (default) or "sqlite": keep dim_students / fact_attendance in a
+# local SQLite file and run their aggregations as SQL (for data beyond RAM)
+STORAGE = os.environ.get("API_STORAGE", "memory").strip().lower()
+SQLITE_PATH = Path(os.environ.get("API_SQLITE_PATH") or BASE_DIR / "datasets" / "school.sqlite")
 
 app = Flask(__name__)
 CORS(app)
 
-# Each table will be a list of dicts
-tables: dict[str, list[dict]] = {
+# Small dimensions are lists of dicts; dim_students and the fact table are
+# stored column-wise (see TABLE_SCHEMAS)
+tables: dict[str, list[dict] | ColumnTable] = {
     "dim_students": [],
     "dim_classes": [],
     "dim_semesters": [],
@@ -23,243 +92,1069 @@ tables: dict[str, list[dict]] = {
     "fact_attendance": [],
 }
 
+# Per-table load progress for /health. A table only appears in `tables`
+# once it is completely loaded; its event is set at that point.
+load_state: dict[str, dict] = {
+    name: {"state": "pending", "rows": 0, "progress": 0.0, "seconds": None, "error": None}
+    for name in tables
+}
+table_ready: dict[str, threading.Event] = {name: threading.Event() for name in tables}
+_load_state_lock = threading.Lock()
+
+scan_engine = ScanEngine(workers=SCAN_WORKERS)
+sql_store = SqlStore(SQLITE_PATH) if STORAGE == "sqlite" else None
+
+
+# -----------------------------------------------------------------------------
+# Metrics
+# -----------------------------------------------------------------------------
+REQUEST_LATENCY = metrics.registry.histogram(
+    "api_request_duration_seconds",
+    "Request latency per endpoint.",
+    labels=("endpoint", "method"),
+)
+REQUESTS_TOTAL = metrics.registry.counter(
+    "api_requests_total",
+    "Requests served per endpoint and status code.",
+    labels=("endpoint", "method", "status"),
+)
+ROWS_SCANNED = metrics.registry.counter(
+    "api_rows_scanned_total",
+    "Table rows iterated by request handlers.",
+    labels=("endpoint",),
+)
+ROWS_SCANNED_PER_REQUEST = metrics.registry.histogram(
+    "api_request_rows_scanned",
+    "Table rows iterated per request.",
+    labels=("endpoint",),
+    buckets=(0, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+)
+CACHE_HITS = metrics.registry.counter(
+    "api_cache_hits_total",
+    "Requests (or parts of requests) answered from a cache.",
+    labels=("endpoint", "cache"),
+)
+TABLE_LOAD_SECONDS = metrics.registry.gauge(
+    "table_load_duration_seconds",
+    "Wall time spent loading each table.",
+    labels=("table",),
+)
+TABLE_ROWS = metrics.registry.gauge(
+    "table_rows",
+    "Rows held in memory per table.",
+    labels=("table",),
+)
+TABLE_MEMORY_BYTES = metrics.registry.gauge(
+    "table_memory_bytes",
+    "Estimated in-memory footprint per table.",
+    labels=("table",),
+)
+TABLE_RSS_DELTA_BYTES = metrics.registry.gauge(
+    "table_load_rss_delta_bytes",
+    "Process RSS growth observed while loading each table.",
+    labels=("table",),
+)
+TABLE_READY = metrics.registry.gauge(
+    "table_ready",
+    "1 once a table has finished loading (or failed / is missing).",
+    labels=("table",),
+)
+PROCESS_RSS_BYTES = metrics.registry.gauge(
+    "process_resident_memory_bytes",
+    "Resident memory of the API process.",
+)
+TABLE_INVALID_VALUES = metrics.registry.gauge(
+    "table_invalid_values",
+    "Missing (null) values and orphan foreign keys per column, found at load.",
+    labels=("table", "column", "kind"),
+)
+COMPUTE_INFLIGHT = metrics.registry.gauge(
+    "compute_inflight",
+    "Distinct heavy computations running or queued on the compute pool.",
+)
+COMPUTE_REJECTED = metrics.registry.counter(
+    "compute_rejected_total",
+    "Requests answered 503 because the compute pool was full or timed out.",
+    labels=("endpoint",),
+)
+
 
 # -----------------------------------------------------------------------------
 # CSV loading helpers
 # -----------------------------------------------------------------------------
-def load_csv_table(name: str, filename: str, int_fields=None) -> None:
+# Update load progress every this many rows
+PROGRESS_EVERY = 100_000
+
+
+def set_load_state(name: str, **fields) -> None:
+    with _load_state_lock:
+        load_state[name].update(fields)
+
+
+def load_snapshot() -> dict:
+    with _load_state_lock:
+        return {name: dict(state) for name, state in load_state.items()}
+
+
+# Declared schema per table, in load order (smallest first, so cheap
+# endpoints can answer while the big tables load). Only the listed columns
+# are kept. Columnar tables pack INT / CATEGORY / DATE columns into int32
+# arrays; row tables are lists of dicts with INT cast and strings interned.
+# `foreign_keys` (column -> (table, column)) are checked at load (see
+# validate_table); `indexes` are only used by the SQLite storage mode.
+TABLE_SCHEMAS: dict[str, dict] = {
+    "dim_classes": {
+        "file": "dim_classes.csv",
+        "columnar": False,
+        "columns": {"class_key": INT, "class_id": INT, "class_name": STR, "grade_level": INT},
+        "indexes": [("class_key",)],
+    },
+    "dim_semesters": {
+        "file": "dim_semesters.csv",
+        "columnar": False,
+        "columns": {
+            "semester_key": INT, "semester_id": INT, "semester_name": STR,
+            "start_date": STR, "end_date": STR,
+        },
+        "indexes": [("semester_key",)],
+    },
+    "dim_date": {
+        "file": "dim_date.csv",
+        "columnar": False,
+        "columns": {
+            "date_key": INT, "date_value": STR, "year": INT, "month": INT,
+            "day": INT, "day_of_week": STR,
+        },
+        "indexes": [("date_key",)],
+    },
+    # 2M rows: names / gender / nationality have a handful of distinct values
+    "dim_students": {
+        "file": "dim_students.csv",
+        "columnar": True,
+        "columns": {
+            "student_key": INT, "student_id": INT,
+            "first_name": CATEGORY, "last_name": CATEGORY,
+            "gender": CATEGORY, "nationality": CATEGORY,
+            "birthdate": DATE, "grade_level": INT, "class_id": INT,
+        },
+        "foreign_keys": {"class_id": ("dim_classes", "class_id")},
+        # first / last name: the type-ahead's IN (...) lookups
+        "indexes": [
+            ("student_key",), ("gender",), ("nationality",), ("grade_level",), ("class_id",),
+            ("first_name",), ("last_name",),
+        ],
+    },
+    "fact_attendance": {
+        "file": "fact_attendance.csv",
+        "columnar": True,
+        "columns": {
+            "attendance_id": INT, "student_key": INT, "class_key": INT,
+            "semester_key": INT, "date_key": INT, "grade": INT,
+        },
+        "foreign_keys": {
+            "student_key": ("dim_students", "student_key"),
+            "class_key": ("dim_classes", "class_key"),
+            "semester_key": ("dim_semesters", "semester_key"),
+            "date_key": ("dim_date", "date_key"),
+        },
+        # (key, grade) pairs let per-key GROUP BYs run from the index alone
+        "indexes": [
+            ("student_key", "grade"), ("class_key", "grade"),
+            ("semester_key", "grade"), ("date_key", "grade"), ("grade",),
+        ],
+    },
+}
+
+
+def load_csv_table(name: str, filename: str, columns: dict[str, str], columnar: bool = False) -> None:
     """
-    Load a CSV file into memory as a list of dicts.
-    Optionally cast some columns to int.
+    Load a CSV file into memory as a list of dicts, keeping only the
+    schema's columns: INT columns are cast to int (None if invalid), other
+    values are interned strings.
+    With columnar=True the table is stored as a ColumnTable instead.
     """
-    if int_fields is None:
-        int_fields = []
+    int_fields = [col for col, kind in columns.items() if kind == INT]
 
     path = DATA_DIR / filename
     if not path.exists():
         print(f"[WARN] {name}: file not found at {path}")
         tables[name] = []
+        set_load_state(name, state="missing", progress=1.0, error=f"file not found: {path}")
         return
 
     print(f"[LOAD] Loading {name} from {path}")
-    rows: list[dict] = []
+    started = time.perf_counter()
+    rows: list[dict] | ColumnTable = []
+    total_bytes = max(1, path.stat().st_size)
+
+    def report_progress():
+        set_load_state(name, rows=len(rows), progress=round(f.buffer.tell() / total_bytes, 3))
 
     with path.open("r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Cast selected fields to int
-            for col in int_fields:
-                val = row.get(col, "")
-                if val == "" or val is None:
-                    row[col] = None
-                else:
-                    try:
-                        row[col] = int(val)
-                    except ValueError:
+        if columnar:
+            reader = csv.reader(f)
+            rows = ColumnTable(name, columns, header=next(reader, []))
+            for record in reader:
+                rows.append_record(record)
+                if len(rows) % PROGRESS_EVERY == 0:
+                    report_progress()
+        else:
+            reader = csv.DictReader(f)
+            for record in reader:
+                row = {
+                    col: sys.intern(val) if isinstance(val, str) else val
+                    for col, val in record.items()
+                    if col in columns
+                }
+                # Cast selected fields to int
+                for col in int_fields:
+                    val = row.get(col, "")
+                    if val == "" or val is None:
                         row[col] = None
-            rows.append(row)
-
-    print(f"[LOAD] {name}: {len(rows):,} rows")
+                    else:
+                        try:
+                            row[col] = int(val)
+                        except ValueError:
+                            row[col] = None
+                rows.append(row)
+                if len(rows) % PROGRESS_EVERY == 0:
+                    report_progress()
+
+    elapsed = time.perf_counter() - started
+    print(f"[LOAD] {name}: {len(rows):,} rows in {elapsed:.2f}s")
+    if columnar:
+        warn_out_of_range(name, {
+            col: len(rows.originals[col]) for col, kind in columns.items() if kind == INT
+        })
     tables[name] = rows
+    set_load_state(name, rows=len(rows), progress=1.0, seconds=round(elapsed, 3))
+
+    TABLE_LOAD_SECONDS.set(elapsed, table=name)
+    TABLE_ROWS.set(len(rows), table=name)
+
+
+def warn_out_of_range(name: str, counts: dict[str, int]) -> None:
+    """
+    INT values outside int32 still show in rows, but are stored as NULL:
+    they never join or aggregate.
+    """
+    for col, n in counts.items():
+        if n:
+            print(f"[WARN] {name}.{col}: {n:,} values outside int32 (treated as NULL by aggregations)")
+
+
+def load_sqlite_table(name: str, filename: str, columns: dict[str, str], indexes=()) -> bool:
+    """
+    Bulk-load a CSV into the SQLite store (once; reused while the file is
+    unchanged). Returns False if the file is missing.
+    """
+    path = DATA_DIR / filename
+    if not path.exists():
+        print(f"[WARN] {name}: file not found at {path}")
+        set_load_state(name, state="missing", progress=1.0, error=f"file not found: {path}")
+        return False
+
+    print(f"[LOAD] Importing {name} from {path} into {sql_store.path}")
+    started = time.perf_counter()
+
+    def report_progress(rows: int, fraction: float):
+        set_load_state(name, rows=rows, progress=round(fraction, 3))
+
+    rows = sql_store.import_csv(name, path, columns, indexes, progress=report_progress)
+    elapsed = time.perf_counter() - started
+    print(f"[LOAD] {name}: {rows:,} rows in SQLite after {elapsed:.2f}s")
+    warn_out_of_range(name, sql_store.out_of_range(name))
+    tables[name] = sql_store.table(name, rows)
+    set_load_state(name, rows=rows, progress=1.0, seconds=round(elapsed, 3))
+
+    TABLE_LOAD_SECONDS.set(elapsed, table=name)
+    TABLE_ROWS.set(rows, table=name)
+    return True
+
+
+def estimate_rows_bytes(rows: list[dict] | ColumnTable, sample_size: int = 1000) -> int:
+    """
+    Rough deep size of a table, extrapolated from an evenly spaced sample.
+    Column-name keys are shared by every row, so they are not counted.
+    """
+    if isinstance(rows, ColumnTable):
+        return rows.nbytes()
+    if not rows:
+        return sys.getsizeof(rows)
+
+    step = max(1, len(rows) // sample_size)
+    sample = rows[::step]
+    sampled = sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row.values())
+        for row in sample
+    )
+    return int(sys.getsizeof(rows) + sampled / len(sample) * len(rows))
+
+
+def load_table(name: str) -> None:
+    """
+    Load one table per its TABLE_SCHEMAS entry, tracking its state in
+    load_state and signalling table_ready when done (succeeded or not).
+    """
+    schema = TABLE_SCHEMAS[name]
+    set_load_state(name, state="loading")
+    rss_before = metrics.process_rss_bytes()
+    try:
+        if sql_store is not None:
+            # Every table goes to SQLite (queries join them); the big
+            # columnar ones are then served from there only
+            found = load_sqlite_table(name, schema["file"], schema["columns"], schema.get("indexes", ()))
+            if found and not schema["columnar"]:
+                load_csv_table(name, schema["file"], schema["columns"])
+        else:
+            load_csv_table(name, schema["file"], schema["columns"], columnar=schema["columnar"])
+
+        for derive in POST_LOAD.get(name, ()) if tables[name] else ():
+            started = time.perf_counter()
+            derive(tables[name])
+            print(f"[LOAD] {name}: {derive.__name__} in {time.perf_counter() - started:.2f}s")
+
+        if tables[name]:
+            started = time.perf_counter()
+            validate_table(name)
+            print(
+                f"[LOAD] {name}: validated in {time.perf_counter() - started:.2f}s, "
+                f"{data_quality[name]['rows_with_exceptions']:,} rows with null / orphan keys"
+            )
+
+        # Move the fact table's packed columns into shared memory for the
+        # parallel scan engine; it never scans the other tables
+        if name == "fact_attendance" and isinstance(tables[name], ColumnTable):
+            scan_engine.publish(tables[name])
+
+        # Footprint once everything built at load is in: derived columns,
+        # NULL bitmaps and the indexes over the table
+        rows = tables[name]
+        in_memory = isinstance(rows, (list, ColumnTable))
+        size = (estimate_rows_bytes(rows) if in_memory else 0) + index_bytes(name)
+        if size:
+            print(f"[LOAD] {name}: ~{size / 2**20:,.1f} MiB in memory")
+            TABLE_MEMORY_BYTES.set(size, table=name)
+        TABLE_RSS_DELTA_BYTES.set(max(0, metrics.process_rss_bytes() - rss_before), table=name)
+    except Exception as exc:
+        print(f"[ERROR] {name}: failed to load: {exc}")
+        tables[name] = []
+        set_load_state(name, state="failed", error=str(exc))
+    else:
+        if load_state[name]["state"] == "loading":
+            set_load_state(name, state="ready")
+    finally:
+        TABLE_READY.set(1, table=name)
+        table_ready[name].set()
 
 
 def load_all_tables() -> None:
     """
     Load all star-schema tables from datasets/clean/*.csv
     """
-    # dim_students.csv: student_key,student_id,first_name,last_name,gender,nationality,birthdate,grade_level,class_id
-    load_csv_table(
-        "dim_students",
-        "dim_students.csv",
-        int_fields=["student_key", "student_id", "grade_level", "class_id"],
-    )
+    for name in TABLE_SCHEMAS:
+        load_table(name)
 
-    # dim_classes.csv: class_key,class_id,class_name,grade_level
-    load_csv_table(
-        "dim_classes",
-        "dim_classes.csv",
-        int_fields=["class_key", "class_id", "grade_level"],
-    )
 
-    # dim_semesters.csv: semester_key,semester_id,semester_name,start_date,end_date
-    load_csv_table(
-        "dim_semesters",
-        "dim_semesters.csv",
-        int_fields=["semester_key", "semester_id"],
-    )
+def start_background_load() -> threading.Thread:
+    loader = threading.Thread(target=load_all_tables, name="table-loader", daemon=True)
+    loader.start()
+    return loader
 
-    # dim_date.csv: date_key,date_value,year,month,day,day_of_week
-    load_csv_table(
-        "dim_date",
-        "dim_date.csv",
-        int_fields=["date_key", "year", "month", "day"],
-    )
 
-    # fact_attendance.csv: attendance_id,student_key,class_key,semester_key,date_key,grade
-    load_csv_table(
-        "fact_attendance",
-        "fact_attendance.csv",
-        int_fields=["attendance_id", "student_key", "class_key", "semester_key", "date_key", "grade"],
-    )
+def wait_until_loaded(timeout: float | None = None) -> bool:
+    """
+    Block until every table has finished loading (True) or timeout (False).
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for event in table_ready.values():
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if not event.wait(remaining):
+            return False
+    return True
+
+
+# -----------------------------------------------------------------------------
+# Denormalized join columns
+# -----------------------------------------------------------------------------
+# The fact table's foreign keys are resolved once, at load, into small int
+# codes (one per distinct dimension label, in sorted label order). Grouping
+# by a dimension attribute is then a dense array-indexed aggregate over a
+# fact column - no per-request lookup dicts and no hashing per row.
+# Dimensions load before the fact table (see TABLE_SCHEMAS), so they are in
+# place when this runs; a missing dimension leaves every key unresolved.
+
+def derive_join_column(fact: ColumnTable, field: str, source: str,
+                       label_by_key: dict, default=None) -> None:
+    """
+    Add `field` to the fact table: fact[source] resolved through
+    label_by_key and replaced by the label's code. Keys missing from
+    label_by_key get the label default(key); without a default (or for a
+    None label) the row's code is NULL, i.e. skipped by aggregations.
+    """
+    labels_by_key = {k: v for k, v in label_by_key.items() if v is not None}
+    if default is not None:
+        for k in set(fact.columns[source]) - labels_by_key.keys():
+            if k != NULL:
+                labels_by_key[k] = default(k)
+
+    labels = sorted(set(labels_by_key.values()))
+    code_by_label = {label: code for code, label in enumerate(labels)}
+    lookup = {k: code_by_label[label] for k, label in labels_by_key.items()}
+    fact.add_derived(field, map_column(fact.columns[source], lookup), labels)
+
+
+def derive_fact_join_columns(fact: ColumnTable) -> None:
+    if not isinstance(fact, ColumnTable):
+        return  # SQLite mode resolves the keys in SQL (sqlstore.FACT_DIMENSIONS)
+
+    students = tables["dim_students"]
+    student_keys = students.columns["student_key"] if isinstance(students, ColumnTable) else []
+
+    # Student attributes (orphan students count as "Unknown")
+    for field in ("gender", "nationality"):
+        derive_join_column(fact, f"{field}_code", "student_key", {
+            sk: students.label_of(field, code) or "Unknown"
+            for sk, code in zip(student_keys, students.columns[field])
+            if sk != NULL
+        } if student_keys else {}, default=lambda sk: "Unknown")
+    derive_join_column(fact, "grade_level_code", "student_key", {
+        sk: level
+        for sk, level in zip(student_keys, students.columns["grade_level"])
+        if sk != NULL and level != NULL
+    } if student_keys else {})
+
+    derive_join_column(fact, "class_code", "class_key", {
+        c["class_key"]: c.get("class_name") or f"Class {c['class_key']}"
+        for c in tables["dim_classes"]
+        if isinstance(c.get("class_key"), int)
+    }, default=lambda ck: f"Class {ck}")
+
+    derive_join_column(fact, "semester_code", "semester_key", {
+        s["semester_key"]: s.get("semester_name") or f"Semester {s['semester_key']}"
+        for s in tables["dim_semesters"]
+        if isinstance(s.get("semester_key"), int)
+    }, default=lambda sk: f"Semester {sk}")
+
+    # Calendar attributes; rows without a usable date are left NULL
+    dates = [d for d in tables["dim_date"] if isinstance(d.get("date_key"), int)]
+    derive_join_column(fact, "date_code", "date_key", {
+        d["date_key"]: d.get("date_value") or None for d in dates
+    })
+    derive_join_column(fact, "year_month_code", "date_key", {
+        d["date_key"]: (d["year"], d["month"])
+        for d in dates
+        if isinstance(d.get("year"), int) and isinstance(d.get("month"), int)
+    })
+    derive_join_column(fact, "weekday_code", "date_key", {
+        d["date_key"]: d.get("day_of_week") or "Unknown" for d in dates
+    }, default=lambda dk: "Unknown")
+
+    # Grades dictionary-encoded too: grouping by grade then needs one slot
+    # per distinct grade, however far apart outliers are
+    grades = set(fact.columns["grade"])
+    grades.discard(NULL)
+    derive_join_column(fact, "grade_code", "grade", {grade: grade for grade in grades})
+
+
+# -----------------------------------------------------------------------------
+# Load-time validation (data quality)
+# -----------------------------------------------------------------------------
+# Each table is checked once, right after it loads: missing (NULL / empty /
+# unparsable) values per column and foreign keys that match no dimension
+# row. Rows with a null or orphan foreign key are counted through one
+# exception bitmap per table. Separately, the per-column NULL bitmaps of
+# columnar tables let scans over columns without NULLs drop the per-row
+# check (see scan.py).
+
+# Distinct orphan keys listed per foreign key
+ORPHAN_SAMPLE = 10
+
+data_quality: dict[str, dict] = {}
+
+
+def key_set(name: str, column: str) -> set:
+    """
+    Distinct non-NULL values of a loaded (in-memory) table column.
+    """
+    rows = tables[name]
+    if isinstance(rows, ColumnTable):
+        keys = set(rows.columns[column])
+        keys.discard(NULL)
+        return keys
+    return {row[column] for row in rows if row.get(column) is not None}
+
+
+def validate_table(name: str) -> None:
+    """
+    Record null counts per column and null / orphan foreign keys of a
+    loaded table in data_quality.
+    """
+    schema = TABLE_SCHEMAS[name]
+    foreign_keys = schema.get("foreign_keys", {})
+    rows = tables[name]
+    report = {"rows": len(rows), "nulls": {}, "foreign_keys": {}}
+
+    if sql_store is not None and schema["columnar"]:
+        # Full-table queries: reuse the saved report while neither this
+        # table nor any table it references has been re-imported
+        sources = [name, *(ref_table for ref_table, _ in foreign_keys.values())]
+        saved = sql_store.saved_report(name, sources)
+        if saved is not None:
+            report = saved
+        else:
+            report["nulls"] = sql_store.null_counts(name)
+            for column, (ref_table, ref_column) in foreign_keys.items():
+                orphans, sample = sql_store.orphan_keys(name, column, ref_table, ref_column, ORPHAN_SAMPLE)
+                report["foreign_keys"][column] = {
+                    "references": f"{ref_table}.{ref_column}",
+                    "nulls": report["nulls"][column],
+                    "orphans": orphans,
+                    "orphan_keys": sample,
+                }
+            report["rows_with_exceptions"] = sql_store.exception_rows(name, foreign_keys)
+            sql_store.save_report(name, sources, report)
+    else:
+        if isinstance(rows, ColumnTable):
+            rows.index_nulls()
+            columns = {column: rows.columns[column] for column in schema["columns"]}
+        else:
+            columns = {column: [row.get(column) for row in rows] for column in schema["columns"]}
+        # Packed columns have their NULL bitmaps; others hold None or ""
+        null_rows = {
+            column: rows.null_rows[column]
+            if isinstance(rows, ColumnTable) and column in rows.null_rows
+            else find_rows(values, {None, ""})
+            for column, values in columns.items()
+        }
+        report["nulls"] = {column: len(nulls) for column, nulls in null_rows.items()}
+
+        exceptions = Bitmap(len(rows))
+        for column, (ref_table, ref_column) in foreign_keys.items():
+            keys = columns[column]
+            orphan_keys = set(keys) - key_set(ref_table, ref_column) - {NULL, None}
+            orphans = find_rows(keys, orphan_keys)
+            exceptions = exceptions | null_rows[column] | orphans
+            report["foreign_keys"][column] = {
+                "references": f"{ref_table}.{ref_column}",
+                "nulls": report["nulls"][column],
+                "orphans": len(orphans),
+                "orphan_keys": sorted(orphan_keys)[:ORPHAN_SAMPLE],
+            }
+        report["rows_with_exceptions"] = len(exceptions)
+        report["exception_bitmap_bytes"] = exceptions.nbytes
+
+    data_quality[name] = report
+    for column, nulls in report["nulls"].items():
+        TABLE_INVALID_VALUES.set(nulls, table=name, column=column, kind="null")
+    for column, fk in report["foreign_keys"].items():
+        TABLE_INVALID_VALUES.set(fk["orphans"], table=name, column=column, kind="orphan")
+
+
+# -----------------------------------------------------------------------------
+# Student name index (type-ahead)
+# -----------------------------------------------------------------------------
+student_names: NameIndex | None = None
+
+
+def build_student_name_index(students) -> None:
+    global student_names
+    if isinstance(students, ColumnTable):
+        student_names = NameIndex.from_table(students)
+    else:
+        student_names = NameIndex.from_pairs(sql_store.name_pairs())
+
+
+# -----------------------------------------------------------------------------
+# Class roster index (class drill-down)
+# -----------------------------------------------------------------------------
+# dim_students rows per class_id and fact_attendance rows per class_key,
+# built once at load, so one class's roster, grades and trend follow its
+# index entries instead of scanning either table. SQLite mode uses the
+# class_id / class_key indexes of its tables instead.
+class_rosters: KeyIndex | None = None
+class_fact_rows: KeyIndex | None = None
+
+
+def build_class_roster_index(students) -> None:
+    global class_rosters
+    class_rosters = KeyIndex.build(students.columns["class_id"]) if isinstance(students, ColumnTable) else None
+
+
+def build_class_fact_index(fact) -> None:
+    global class_fact_rows
+    class_fact_rows = KeyIndex.build(fact.columns["class_key"]) if isinstance(fact, ColumnTable) else None
+
+
+def index_bytes(name: str) -> int:
+    """
+    Memory held by the load-time indexes built over a table.
+    """
+    indexes = {
+        "dim_students": (student_names, class_rosters),
+        "fact_attendance": (class_fact_rows,),
+    }.get(name, ())
+    return sum(index.nbytes for index in indexes if index is not None)
+
+
+# Extra work run, in order, on a (non-empty) table right after it is loaded
+POST_LOAD = {
+    "dim_students": (build_student_name_index, build_class_roster_index),
+    "fact_attendance": (derive_fact_join_columns, build_class_fact_index),
+}
 
 
 print("[SERVER] Starting Flask API...")
 print(f"[SERVER] Loading CSV datasets from: {DATA_DIR}")
-load_all_tables()
+if BACKGROUND_LOAD:
+    start_background_load()
+else:
+    load_all_tables()
 
 
 # -----------------------------------------------------------------------------
 # Utility
 # -----------------------------------------------------------------------------
+class TablesNotReady(Exception):
+    """
+    Raised when a request needs a table that is still loading.
+    """
+
+    def __init__(self, names: list[str]):
+        super().__init__(", ".join(names))
+        self.names = names
+
+
 def ensure_tables(*names: str):
     """
     Check that given tables are loaded and non-empty.
+    Tables still loading are waited for up to TABLE_WAIT_SECONDS, after
+    which TablesNotReady is raised (answered with 503).
     """
+    deadline = time.monotonic() + TABLE_WAIT_SECONDS
+    pending = [
+        n for n in names
+        if n in table_ready
+        and not table_ready[n].wait(max(0.0, deadline - time.monotonic()))
+    ]
+    if pending:
+        raise TablesNotReady(pending)
+
     missing = [n for n in names if not tables.get(n)]
     return missing
 
 
+def count_scanned(n: int) -> None:
+    """
+    Record that the current request iterated over n table rows.
+    """
+    g.rows_scanned = g.get("rows_scanned", 0) + n
+
+
+def count_cache_hit(cache: str) -> None:
+    """
+    Record that the current request was (partly) answered from a cache.
+    """
+    CACHE_HITS.inc(endpoint=_endpoint_label(), cache=cache)
+
+
+def fact_groups(key=None, value=None) -> tuple[list, int]:
+    """
+    Sum of `value` and row count per label of fact_attendance column `key`
+    (a derived join column or a raw fact column; None = one group).
+    Returns ([(label, sum, count)] in label order, rows skipped because
+    the key or value is NULL), from memory or SQLite alike.
+    """
+    if sql_store is not None:
+        return sql_store.fact_groups(key, value)
+
+    fact = tables["fact_attendance"]
+    agg = scan_engine.group_sum_count(fact, key=key, value=value)
+    labels = fact.dictionaries.get(key) if key is not None else None
+    groups = [
+        (labels[k] if labels is not None else (k if key is not None else None), total, n)
+        for k, total, n in agg.items()
+    ]
+    return groups, agg.skipped
+
+
+def student_counts(field: str) -> list[tuple]:
+    """
+    Rows per distinct dim_students value (None for NULL), in order of
+    first appearance.
+    """
+    if sql_store is not None:
+        return sql_store.student_counts(field)
+
+    students = tables["dim_students"]
+    counts = Counter(students.columns[field]).items()
+    if field in students.dictionaries:
+        return [(students.label_of(field, code), n) for code, n in counts]
+    return [(None if v == NULL else v, n) for v, n in counts]
+
+
+def fact_cube(keys: list[str], value=None, nullable=()) -> Cube:
+    """
+    Dense sum / count of `value` for every combination of labels of the
+    given fact_attendance columns (derived join columns or raw columns),
+    from memory or SQLite alike. Keys in `nullable` keep NULL as a last
+    label None instead of skipping those rows.
+    """
+    if sql_store is not None:
+        groups, skipped = sql_store.fact_cube(keys, value, nullable)
+        return Cube.from_groups(keys, groups, skipped)
+
+    fact = tables["fact_attendance"]
+    offsets, shape, agg = scan_engine.cube_sum_count(fact, keys, value, nullable)
+    labels = []
+    for key, offset, size in zip(keys, offsets, shape):
+        if key in nullable:
+            size -= 1
+        if key in fact.dictionaries:
+            axis = fact.dictionaries[key][offset:offset + size]
+        else:
+            axis = list(range(offset, offset + size))
+        labels.append(axis + [None] if key in nullable else axis)
+    return Cube(keys, labels, agg.sums, agg.counts, agg.skipped)
+
+
+def grade_stats_by(key: str) -> tuple[list, int]:
+    """
+    Grade statistics per label of a fact_attendance column, from a single
+    scan: a (label, grade) histogram over the dictionary-encoded grades
+    whose buckets are merged as runs of equal grades. Returns ([(label, records, grade sum, RunningStats)] in
+    label order, rows skipped because the label is NULL). `records`
+    includes rows without a grade; the stats cover graded rows only.
+    """
+    cube = fact_cube([key, "grade_code"], nullable=("grade_code",))
+    per_label: dict = {}
+    for (label, grade), _, n in cube.cells():
+        entry = per_label.setdefault(label, [0, 0, RunningStats()])
+        entry[0] += n
+        if grade is not None:
+            entry[1] += grade * n
+            entry[2].merge(RunningStats.of_constant(grade, n))
+    groups = [(label, records, total, stats) for label, (records, total, stats) in per_label.items()]
+    return groups, cube.skipped
+
+
+def grade_stats_fields(total: int, stats: RunningStats) -> dict:
+    """
+    avg / stddev / variance / min / max of a group's grades for responses.
+    """
+    n = stats.count
+    return {
+        "avg_grade": round(total / n, 2) if n > 0 else None,
+        "stddev_grade": round(stats.stddev, 2) if n > 0 else None,
+        "variance_grade": round(stats.variance, 2) if n > 0 else None,
+        "min_grade": stats.min,
+        "max_grade": stats.max,
+    }
+
+
+compute_pool = ComputePool(
+    workers=COMPUTE_WORKERS,
+    max_queue=COMPUTE_QUEUE,
+    timeout=COMPUTE_TIMEOUT,
+)
+
+
+def run_heavy(name: str, fn, *args, scans=()):
+    """
+    Run an aggregation on the compute pool. Concurrent calls with the same
+    name and arguments share a single computation (single-flight).
+    `scans` names the tables fn iterates, for the rows-scanned metric.
+    """
+    if g.get("profile_requested") and g.get("profiler") is not None:
+        # Explicitly profiled requests run inline so the profile sees the
+        # aggregation
+        result, shared = fn(*args), False
+    elif g.get("profiler") is not None:
+        # Slow-request profiling (on for every request) keeps the pool,
+        # single-flight and backpressure: the worker profiles fn itself and
+        # the request's profile entry merges that in
+        (result, worker_profiler), shared = compute_pool.run(
+            (name, "profiled") + args, profiling.profiled(fn), *args
+        )
+        if worker_profiler is not None:
+            g.worker_profilers = [*g.get("worker_profilers", ()), worker_profiler]
+    else:
+        result, shared = compute_pool.run((name,) + args, fn, *args)
+
+    if shared:
+        count_cache_hit("singleflight")
+    else:
+        count_scanned(sum(len(tables[t]) for t in scans))
+    return result
+
+
+@app.errorhandler(ComputeUnavailable)
+def _compute_unavailable(exc: ComputeUnavailable):
+    COMPUTE_REJECTED.inc(endpoint=_endpoint_label())
+    response = jsonify(error="Server busy, retry later", reason=str(exc))
+    response.status_code = 503
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response
+
+
+@app.errorhandler(TablesNotReady)
+def _tables_not_ready(exc: TablesNotReady):
+    snapshot = load_snapshot()
+    response = jsonify(
+        error="Required tables still loading",
+        loading={n: snapshot[n] for n in exc.names},
+    )
+    response.status_code = 503
+    response.headers["Retry-After"] = "2"
+    return response
+
+
+# ?format= values for list endpoints (see respond)
+RESPONSE_FORMATS = ("json", "columnar", "arrow")
+
+
+def respond(payload: dict):
+    """
+    jsonify a {"data": [row dicts], ...} payload. ?format=columnar sends
+    "data" as one array per column (dictionary-encoding repetitive string
+    columns), ?format=arrow as an Arrow IPC stream (needs pyarrow) with the
+    other fields in its schema metadata.
+    """
+    fmt = request.args.get("format", default="json", type=str)
+    if fmt == "json":
+        return jsonify(payload)
+    if fmt not in RESPONSE_FORMATS:
+        return jsonify(error="Invalid format", allowed=list(RESPONSE_FORMATS)), 400
+
+    rows = payload.get("data") or []
+    rest = {k: v for k, v in payload.items() if k != "data"}
+    if fmt == "columnar":
+        return jsonify(format="columnar", data=formats.columnar_json(rows), **rest)
+
+    if not formats.ARROW_AVAILABLE:
+        return jsonify(error="Arrow format unavailable (pyarrow is not installed)"), 406
+    return Response(formats.arrow_ipc(rows, rest), content_type=formats.ARROW_CONTENT_TYPE)
+
+
+def _endpoint_label() -> str:
+    # Use the route pattern, not the raw path, to keep label cardinality bounded
+    rule = request.url_rule
+    return rule.rule if rule is not None else "<unmatched>"
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+    g.rows_scanned = 0
+
+
+# -----------------------------------------------------------------------------
+# Profiling & slow-request log
+# -----------------------------------------------------------------------------
+profiles = profiling.ProfileStore()
+
+
+def _profile_requested() -> bool:
+    if not PROFILING_ENABLED:
+        return False
+    flag = request.headers.get("X-Profile") or request.args.get("profile")
+    return flag is not None and flag.lower() in ("1", "true", "yes")
+
+
+@app.before_request
+def _start_profiler():
+    g.profile_requested = _profile_requested()
+    g.profiler = None
+    if g.profile_requested or (SLOW_REQUEST_PROFILE and SLOW_REQUEST_MS > 0):
+        g.profiler = profiling.start_profiler()
+
+
+@app.after_request
+def _finish_profiler(response):
+    profiler = g.get("profiler")
+    if profiler is not None:
+        profiler.disable()
+
+    started = g.get("request_started")
+    if started is None:
+        return response
+    duration_ms = (time.perf_counter() - started) * 1000
+    is_slow = SLOW_REQUEST_MS > 0 and duration_ms >= SLOW_REQUEST_MS
+
+    entry = None
+    if profiler is not None and (g.profile_requested or is_slow):
+        entry = profiles.add(
+            endpoint=_endpoint_label(),
+            path=request.full_path,
+            duration_ms=duration_ms,
+            reason="requested" if g.profile_requested else "slow",
+            profiler=profiler,
+            rows_scanned=g.get("rows_scanned", 0),
+            extra=g.get("worker_profilers", ()),
+        )
+        response.headers["X-Profile-Id"] = str(entry["id"])
+
+    if is_slow:
+        summary = ""
+        if entry is not None:
+            # Pooled aggregations: show the worker's hot spots, not the wait
+            top = entry.get("compute_top_functions") or entry["top_functions"]
+            summary = f" top: {profiling.compact_summary(top)}"
+        print(
+            f"[SLOW] {request.method} {request.full_path} {duration_ms:.1f}ms "
+            f"status={response.status_code} rows_scanned={g.get('rows_scanned', 0):,}"
+            f"{summary}"
+        )
+    return response
+
+
+@app.after_request
+def _record_request_metrics(response):
+    started = g.get("request_started")
+    if started is not None:
+        endpoint = _endpoint_label()
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - started, endpoint=endpoint, method=request.method
+        )
+        REQUESTS_TOTAL.inc(
+            endpoint=endpoint, method=request.method, status=str(response.status_code)
+        )
+        scanned = g.get("rows_scanned", 0)
+        ROWS_SCANNED.inc(scanned, endpoint=endpoint)
+        ROWS_SCANNED_PER_REQUEST.observe(scanned, endpoint=endpoint)
+    return response
+
+
 # -----------------------------------------------------------------------------
 # Endpoints
 # -----------------------------------------------------------------------------
 
 @app.route("/health", methods=["GET"])
 def health():
+    ready = all(event.is_set() for event in table_ready.values())
     return jsonify(
-        status="ok",
+        status="ok" if ready else "loading",
+        ready=ready,
         tables={name: len(rows) for name, rows in tables.items()},
+        loading=load_snapshot(),
     )
 
 
-@app.route("/students/count", methods=["GET"])
-def students_count():
-    missing = ensure_tables("dim_students")
-    if missing:
-        return jsonify(
-            error="Required tables not loaded",
-            missing=missing,
-        ), 500
+@app.route("/data-quality", methods=["GET"])
+def data_quality_report():
+    """
+    Load-time validation results per loaded table.
+    """
+    reports = {name: data_quality[name] for name in TABLE_SCHEMAS if name in data_quality}
+    clean = all(not report["rows_with_exceptions"] for report in reports.values())
+    return jsonify(
+        status="ok" if clean else "issues",
+        tables=reports,
+    )
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    PROCESS_RSS_BYTES.set(metrics.process_rss_bytes())
+    COMPUTE_INFLIGHT.set(compute_pool.stats()["inflight"])
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
 
-    students = tables["dim_students"]
-    total = len(students)
 
-    # group by gender
+def compute_students_count() -> dict:
+    total = len(tables["dim_students"])
+
+    # group by gender: count per value, then fold NULLs into "Unknown"
     gender_counts: defaultdict[str, int] = defaultdict(int)
-    for row in students:
-        gender = row.get("gender") or "Unknown"
-        gender_counts[gender] += 1
+    for gender, n in student_counts("gender"):
+        gender_counts[gender or "Unknown"] += n
 
     by_gender = [
         {"gender": g, "count": c}
         for g, c in sorted(gender_counts.items())
     ]
 
-    return jsonify(
+    return dict(
         total_students=total,
         by_gender=by_gender,
     )
 
 
-@app.route("/grades/by-gender", methods=["GET"])
-def grades_by_gender():
-    missing = ensure_tables("fact_attendance", "dim_students")
+@app.route("/students/count", methods=["GET"])
+def students_count():
+    missing = ensure_tables("dim_students")
     if missing:
         return jsonify(
             error="Required tables not loaded",
             missing=missing,
         ), 500
 
-    fact = tables["fact_attendance"]
-    students = tables["dim_students"]
-
-    # Build lookup: student_key -> gender
-    gender_by_student_key: dict[int, str] = {}
-    for s in students:
-        sk = s.get("student_key")
-        if isinstance(sk, int):
-            gender_by_student_key[sk] = s.get("gender") or "Unknown"
-
-    # Aggregate grades by gender
-    sum_by_gender: defaultdict[str, int] = defaultdict(int)
-    count_by_gender: defaultdict[str, int] = defaultdict(int)
+    return jsonify(run_heavy("students_count", compute_students_count, scans=("dim_students",)))
 
-    for row in fact:
-        sk = row.get("student_key")
-        grade = row.get("grade")
 
-        if not isinstance(sk, int) or not isinstance(grade, int):
-            continue
-
-        gender = gender_by_student_key.get(sk, "Unknown")
-        sum_by_gender[gender] += grade
-        count_by_gender[gender] += 1
+def compute_grades_by_gender() -> dict:
+    # Grade stats per gender (student_key resolved at load), one scan
+    per_gender, _ = grade_stats_by("gender_code")
 
     result = []
-    for gender, total_grade in sum_by_gender.items():
-        n = count_by_gender[gender]
-        avg = total_grade / n if n > 0 else None
+    for gender, _, total_grade, stats in per_gender:
+        if not stats.count:
+            continue
         result.append(
             {
                 "gender": gender,
-                "avg_grade": round(avg, 2) if avg is not None else None,
-                "num_records": n,
+                "num_records": stats.count,
+                **grade_stats_fields(total_grade, stats),
             }
         )
 
     # Sort for stable output
     result.sort(key=lambda r: r["gender"])
 
-    return jsonify(data=result)
+    return dict(data=result)
 
 
-@app.route("/grades/by-class", methods=["GET"])
-def grades_by_class():
-    missing = ensure_tables("fact_attendance", "dim_classes")
+@app.route("/grades/by-gender", methods=["GET"])
+def grades_by_gender():
+    missing = ensure_tables("fact_attendance", "dim_students")
     if missing:
         return jsonify(
             error="Required tables not loaded",
             missing=missing,
         ), 500
 
-    fact = tables["fact_attendance"]
-    classes = tables["dim_classes"]
-
-    # class_key -> class_name
-    name_by_class_key: dict[int, str] = {}
-    for c in classes:
-        ck = c.get("class_key")
-        if isinstance(ck, int):
-            name_by_class_key[ck] = c.get("class_name") or f"Class {ck}"
-
-    sum_by_class: defaultdict[str, int] = defaultdict(int)
-    count_by_class: defaultdict[str, int] = defaultdict(int)
+    return jsonify(run_heavy("grades_by_gender", compute_grades_by_gender, scans=("fact_attendance",)))
 
-    for row in fact:
-        ck = row.get("class_key")
-        grade = row.get("grade")
 
-        if not isinstance(ck, int) or not isinstance(grade, int):
-            continue
-
-        cname = name_by_class_key.get(ck, f"Class {ck}")
-        sum_by_class[cname] += grade
-        count_by_class[cname] += 1
+def compute_grades_by_class() -> dict:
+    per_class, _ = grade_stats_by("class_code")
 
     result = []
-    for cname, total_grade in sum_by_class.items():
-        n = count_by_class[cname]
-        avg = total_grade / n if n > 0 else None
+    for cname, _, total_grade, stats in per_class:
+        if not stats.count:
+            continue
         result.append(
             {
                 "class_name": cname,
-                "avg_grade": round(avg, 2) if avg is not None else None,
-                "num_records": n,
+                "num_records": stats.count,
+                **grade_stats_fields(total_grade, stats),
             }
         )
 
     result.sort(key=lambda r: r["class_name"])
 
-    return jsonify(data=result)
+    return dict(data=result)
+
+
+@app.route("/grades/by-class", methods=["GET"])
+def grades_by_class():
+    missing = ensure_tables("fact_attendance", "dim_classes")
+    if missing:
+        return jsonify(
+            error="Required tables not loaded",
+            missing=missing,
+        ), 500
+
+    return jsonify(run_heavy("grades_by_class", compute_grades_by_class, scans=("fact_attendance",)))
 
 
 @app.route("/debug/sample", methods=["GET"])
@@ -272,6 +1167,28 @@ def debug_sample():
         }
     return jsonify(out)
 
+
+@app.route("/debug/profiles", methods=["GET"])
+def debug_profiles():
+    if not PROFILING_ENABLED:
+        return jsonify(error="Profiling disabled (set API_PROFILING=1)"), 404
+    return jsonify(data=profiles.recent())
+
+
+@app.route("/debug/profiles/<int:profile_id>", methods=["GET"])
+def debug_profile(profile_id: int):
+    if not PROFILING_ENABLED:
+        return jsonify(error="Profiling disabled (set API_PROFILING=1)"), 404
+
+    entry = profiles.get(profile_id)
+    if entry is None:
+        return jsonify(error="Profile not found", id=profile_id), 404
+
+    if request.args.get("format") == "text":
+        return Response(entry["text"], content_type="text/plain; charset=utf-8")
+    return jsonify({k: v for k, v in entry.items() if k != "text"})
+
+
 @app.route("/kpis/total-classes", methods=["GET"])
 def kpis_total_classes():
     missing = ensure_tables("dim_classes")
@@ -296,132 +1213,134 @@ def kpis_total_attendance():
     return jsonify(total_attendance_records=total)
 
 
-@app.route("/kpis/average-grade", methods=["GET"])
-def kpis_average_grade():
-    missing = ensure_tables("fact_attendance")
-    if missing:
-        return jsonify(error="Required tables not loaded", missing=missing), 500
-    
-    fact = tables["fact_attendance"]
-    
-    total_grade = 0
-    count = 0
-    
-    for row in fact:
-        grade = row.get("grade")
-        if isinstance(grade, int):
-            total_grade += grade
-            count += 1
+def compute_kpis_average_grade() -> dict:
+    overall, _ = fact_groups(value="grade")
+    total_grade = sum(total for _, total, _ in overall)
+    count = sum(n for _, _, n in overall)
     
     avg_grade = round(total_grade / count, 2) if count > 0 else None
     
-    return jsonify(
+    return dict(
         average_grade=avg_grade,
         total_records=count
     )
 
-@app.route("/students/by-nationality", methods=["GET"])
-def students_by_nationality():
-    missing = ensure_tables("dim_students")
+
+@app.route("/kpis/average-grade", methods=["GET"])
+def kpis_average_grade():
+    missing = ensure_tables("fact_attendance")
     if missing:
         return jsonify(error="Required tables not loaded", missing=missing), 500
-    
-    students = tables["dim_students"]
-    
+
+    return jsonify(run_heavy("kpis_average_grade", compute_kpis_average_grade, scans=("fact_attendance",)))
+
+
+def compute_students_by_nationality() -> dict:
     nationality_counts: defaultdict[str, int] = defaultdict(int)
-    for row in students:
-        nationality = row.get("nationality") or "Unknown"
-        nationality_counts[nationality] += 1
+    for nationality, n in student_counts("nationality"):
+        nationality_counts[nationality or "Unknown"] += n
     
     result = [
         {"nationality": n, "count": c}
         for n, c in sorted(nationality_counts.items(), key=lambda x: -x[1])
     ]
     
-    return jsonify(data=result)
+    return dict(data=result)
 
 
-@app.route("/students/by-grade-level", methods=["GET"])
-def students_by_grade_level():
+@app.route("/students/by-nationality", methods=["GET"])
+def students_by_nationality():
     missing = ensure_tables("dim_students")
     if missing:
         return jsonify(error="Required tables not loaded", missing=missing), 500
-    
-    students = tables["dim_students"]
-    
+
+    return jsonify(run_heavy("students_by_nationality", compute_students_by_nationality, scans=("dim_students",)))
+
+
+def compute_students_by_grade_level() -> dict:
     grade_counts: defaultdict[int, int] = defaultdict(int)
-    for row in students:
-        grade_level = row.get("grade_level")
-        if isinstance(grade_level, int):
-            grade_counts[grade_level] += 1
+    for grade_level, n in student_counts("grade_level"):
+        if grade_level is not None:
+            grade_counts[grade_level] += n
     
     result = [
         {"grade_level": g, "count": c}
         for g, c in sorted(grade_counts.items())
     ]
     
-    return jsonify(data=result)
+    return dict(data=result)
 
 
-@app.route("/students/list", methods=["GET"])
-def students_list():
+@app.route("/students/by-grade-level", methods=["GET"])
+def students_by_grade_level():
     missing = ensure_tables("dim_students")
     if missing:
         return jsonify(error="Required tables not loaded", missing=missing), 500
-    
+
+    return jsonify(run_heavy("students_by_grade_level", compute_students_by_grade_level, scans=("dim_students",)))
+
+
+def select_students(search, gender, nationality, grade_level) -> list[int] | range:
+    """
+    Row indexes of the in-memory dim_students matching /students/list filters.
+    """
     students = tables["dim_students"]
-    
-    # Get filter parameters
-    search = request.args.get("search", default=None, type=str)
-    gender = request.args.get("gender", default=None, type=str)
-    nationality = request.args.get("nationality", default=None, type=str)
-    grade_level = request.args.get("grade_level", default=None, type=int)
-    
-    # Get pagination parameters
-    page = request.args.get("page", default=1, type=int)
-    per_page = request.args.get("per_page", default=100, type=int)
-    
-    # Apply filters (AND logic - all filters must match)
-    filtered_students = []
-    
-    for student in students:
-        # Search filter (case-insensitive match in first_name or last_name)
-        if search:
-            search_lower = search.lower()
-            first_name = (student.get("first_name") or "").lower()
-            last_name = (student.get("last_name") or "").lower()
-            if search_lower not in first_name and search_lower not in last_name:
-                continue
-        
-        # Gender filter (exact match)
-        if gender:
-            student_gender = student.get("gender")
-            if student_gender != gender:
-                continue
-        
-        # Nationality filter (exact match)
-        if nationality:
-            student_nationality = student.get("nationality")
-            if student_nationality != nationality:
-                continue
-        
-        # Grade level filter (exact match)
-        if grade_level is not None:
-            student_grade = student.get("grade_level")
-            if not isinstance(student_grade, int) or student_grade != grade_level:
-                continue
-        
-        # All filters passed, include this student
-        filtered_students.append(student)
-    
+    cols = students.columns
+
+    # Apply filters (AND logic - all filters must match). Text filters are
+    # resolved against the small category dictionaries first, so each row
+    # check is just an int code lookup.
+    selected = range(len(students))
+
+    # Search filter (case-insensitive match in first_name or last_name)
+    if search:
+        search_lower = search.lower()
+        first_codes = {
+            code for code, name in enumerate(students.dictionaries["first_name"])
+            if search_lower in name.lower()
+        }
+        last_codes = {
+            code for code, name in enumerate(students.dictionaries["last_name"])
+            if search_lower in name.lower()
+        }
+        first_col, last_col = cols["first_name"], cols["last_name"]
+        selected = [
+            i for i in selected
+            if first_col[i] in first_codes or last_col[i] in last_codes
+        ]
+
+    # Gender / nationality filters (exact match)
+    for field, wanted in (("gender", gender), ("nationality", nationality)):
+        if wanted:
+            code = students.code_of(field, wanted)
+            col = cols[field]
+            selected = [i for i in selected if col[i] == code] if code is not None else []
+
+    # Grade level filter (exact match)
+    if grade_level is not None:
+        col = cols["grade_level"]
+        selected = [i for i in selected if col[i] == grade_level] if grade_level != NULL else []
+
+    return selected
+
+
+def compute_students_list(search, gender, nationality, grade_level, page, per_page) -> dict:
     # Calculate pagination on filtered dataset
-    total = len(filtered_students)
     start = (page - 1) * per_page
     end = start + per_page
+
+    if sql_store is not None:
+        # Filtering and paging run as one SQL query
+        total, paginated_students = sql_store.students_page(
+            search, gender, nationality, grade_level, start, end
+        )
+    else:
+        selected = select_students(search, gender, nationality, grade_level)
+        total = len(selected)
+        students = tables["dim_students"]
+        paginated_students = [students.row(i) for i in selected[start:end]]
     
-    paginated_students = filtered_students[start:end]
-    
-    return jsonify(
+    return dict(
         data=paginated_students,
         pagination={
             "page": page,
@@ -431,14 +1350,69 @@ def students_list():
         }
     )
 
-@app.route("/grades/distribution", methods=["GET"])
-def grades_distribution():
-    missing = ensure_tables("fact_attendance")
+
+@app.route("/students/list", methods=["GET"])
+def students_list():
+    missing = ensure_tables("dim_students")
     if missing:
         return jsonify(error="Required tables not loaded", missing=missing), 500
+
+    # Get filter parameters
+    search = request.args.get("search", default=None, type=str)
+    gender = request.args.get("gender", default=None, type=str)
+    nationality = request.args.get("nationality", default=None, type=str)
+    grade_level = request.args.get("grade_level", default=None, type=int)
     
-    fact = tables["fact_attendance"]
-    
+    # Get pagination parameters
+    page = request.args.get("page", default=1, type=int)
+    per_page = request.args.get("per_page", default=100, type=int)
+
+    return respond(run_heavy(
+        "students_list",
+        compute_students_list,
+        search, gender, nationality, grade_level, page, per_page,
+        scans=("dim_students",),
+    ))
+
+
+# Type-ahead results per request (default / max)
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+
+
+@app.route("/students/suggest", methods=["GET"])
+def students_suggest():
+    missing = ensure_tables("dim_students")
+    if missing or student_names is None:
+        return jsonify(error="Required tables not loaded", missing=missing or ["dim_students"]), 500
+
+    query = request.args.get("q", default="", type=str)
+    limit = request.args.get("limit", default=SUGGEST_LIMIT, type=int)
+    limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+
+    # Answered from the name index; at most `limit` rows are materialised
+    index = student_names
+    first, last, both = index.match(query)
+    if index.postings is not None:
+        students = tables["dim_students"]
+        rows = [students.row(i) for i in index.rows(first, last, both, limit)]
+    else:
+        rows = sql_store.students_named(
+            [index.names["first_name"][c] for c in first],
+            [index.names["last_name"][c] for c in last],
+            both, limit,
+        )
+    count_scanned(len(rows))
+
+    return respond(dict(
+        query=query,
+        total=index.count(first, last, both),
+        names=index.top_names(first, last, both, limit),
+        data=rows,
+    ))
+
+
+def compute_grades_distribution() -> dict:
     bins = {
         "40-49": 0,
         "50-59": 0,
@@ -448,64 +1422,45 @@ def grades_distribution():
         "90-100": 0
     }
     
-    for row in fact:
-        grade = row.get("grade")
-        if isinstance(grade, int):
-            if 40 <= grade < 50:
-                bins["40-49"] += 1
-            elif 50 <= grade < 60:
-                bins["50-59"] += 1
-            elif 60 <= grade < 70:
-                bins["60-69"] += 1
-            elif 70 <= grade < 80:
-                bins["70-79"] += 1
-            elif 80 <= grade < 90:
-                bins["80-89"] += 1
-            elif 90 <= grade <= 100:
-                bins["90-100"] += 1
+    # Count rows per distinct grade value, then bucket the (few) grades
+    per_grade, _ = fact_groups("grade_code")
+    for grade, _, n in per_grade:
+        if 40 <= grade < 50:
+            bins["40-49"] += n
+        elif 50 <= grade < 60:
+            bins["50-59"] += n
+        elif 60 <= grade < 70:
+            bins["60-69"] += n
+        elif 70 <= grade < 80:
+            bins["70-79"] += n
+        elif 80 <= grade < 90:
+            bins["80-89"] += n
+        elif 90 <= grade <= 100:
+            bins["90-100"] += n
     
     result = [
         {"range": range_name, "count": count}
         for range_name, count in bins.items()
     ]
     
-    return jsonify(data=result)
+    return dict(data=result)
 
 
-@app.route("/grades/trend-by-date", methods=["GET"])
-def grades_trend_by_date():
-    missing = ensure_tables("fact_attendance", "dim_date")
+@app.route("/grades/distribution", methods=["GET"])
+def grades_distribution():
+    missing = ensure_tables("fact_attendance")
     if missing:
         return jsonify(error="Required tables not loaded", missing=missing), 500
-    
-    fact = tables["fact_attendance"]
-    dates = tables["dim_date"]
-    
-    date_by_key: dict[int, str] = {}
-    for d in dates:
-        dk = d.get("date_key")
-        if isinstance(dk, int):
-            date_by_key[dk] = d.get("date_value") or ""
-    
-    sum_by_date: defaultdict[str, int] = defaultdict(int)
-    count_by_date: defaultdict[str, int] = defaultdict(int)
-    
-    for row in fact:
-        dk = row.get("date_key")
-        grade = row.get("grade")
-        
-        if not isinstance(dk, int) or not isinstance(grade, int):
-            continue
-        
-        date_value = date_by_key.get(dk, "")
-        if date_value:
-            sum_by_date[date_value] += grade
-            count_by_date[date_value] += 1
-    
+
+    return jsonify(run_heavy("grades_distribution", compute_grades_distribution, scans=("fact_attendance",)))
+
+
+def compute_grades_trend_by_date() -> dict:
+    # date_code follows date_value order, so groups come out sorted
+    per_date, _ = fact_groups("date_code", "grade")
+
     result = []
-    for date_value in sorted(sum_by_date.keys()):
-        total = sum_by_date[date_value]
-        count = count_by_date[date_value]
+    for date_value, total, count in per_date:
         avg = round(total / count, 2) if count > 0 else None
         result.append({
             "date": date_value,
@@ -513,37 +1468,328 @@ def grades_trend_by_date():
             "count": count
         })
     
-    return jsonify(data=result)
+    return dict(data=result)
 
 
-@app.route("/attendance/by-month", methods=["GET"])
-def attendance_by_month():
+@app.route("/grades/trend-by-date", methods=["GET"])
+def grades_trend_by_date():
     missing = ensure_tables("fact_attendance", "dim_date")
     if missing:
         return jsonify(error="Required tables not loaded", missing=missing), 500
-    
+
+    return respond(run_heavy("grades_trend_by_date", compute_grades_trend_by_date, scans=("fact_attendance",)))
+
+
+# Prefix sums of grade sum / count per day, built on first use per loaded
+# fact table; every later time-series query only does O(1) range lookups.
+_grade_series: dict = {}
+_grade_series_lock = threading.Lock()
+
+
+def grade_series_cached() -> bool:
+    cached = _grade_series.get("grade")
+    return cached is not None and cached[0] is tables["fact_attendance"]
+
+
+def grade_series() -> PrefixSeries:
     fact = tables["fact_attendance"]
-    dates = tables["dim_date"]
-    
-    year_month_by_key: dict[int, tuple[int, int]] = {}
-    for d in dates:
-        dk = d.get("date_key")
-        year = d.get("year")
-        month = d.get("month")
-        if isinstance(dk, int) and isinstance(year, int) and isinstance(month, int):
-            year_month_by_key[dk] = (year, month)
-    
-    count_by_month: defaultdict[tuple[int, int], int] = defaultdict(int)
-    
-    for row in fact:
-        dk = row.get("date_key")
-        if isinstance(dk, int):
-            ym = year_month_by_key.get(dk)
-            if ym:
-                count_by_month[ym] += 1
+    with _grade_series_lock:
+        if grade_series_cached():
+            return _grade_series["grade"][1]
+
+        points = []
+        per_date, _ = fact_groups("date_code", "grade")
+        for date_value, total, n in per_date:
+            try:
+                points.append((date.fromisoformat(date_value), total, n))
+            except ValueError:
+                continue
+        series = PrefixSeries.from_points(points)
+        _grade_series["grade"] = (fact, series)
+        return series
+
+
+def semester_periods() -> list[tuple]:
+    """
+    (semester_name, start, end) for semesters with valid ISO dates.
+    """
+    periods = []
+    for s in tables["dim_semesters"]:
+        try:
+            lo = date.fromisoformat(s.get("start_date") or "")
+            hi = date.fromisoformat(s.get("end_date") or "")
+        except ValueError:
+            continue
+        periods.append((s.get("semester_name") or f"Semester {s.get('semester_key')}", lo, hi))
+    return periods
+
+
+def resample(series: PrefixSeries, start: date, end: date, freq: str) -> list[dict]:
+    """
+    Average grade and graded-row count per `freq` bucket of a daily series
+    over [start, end].
+    """
+    if freq == "semester":
+        buckets = period_buckets(semester_periods(), start, end)
+    else:
+        buckets = CALENDAR_BUCKETS[freq](start, end)
+
+    result = []
+    for label, lo, hi in buckets:
+        total, count = series.total(lo, hi)
+        result.append({
+            "period": label,
+            "start": lo.isoformat(),
+            "end": hi.isoformat(),
+            "average_grade": round(total / count, 2) if count > 0 else None,
+            "count": count,
+        })
+    return result
+
+
+def compute_grades_timeseries(start, end, freq, window) -> dict:
+    series = grade_series()
+    if not series.days:
+        return dict(freq=freq, start=None, end=None, window=window, data=[])
+
+    # Clip the requested range to the days that have data
+    start = max(start or series.first_day, series.first_day)
+    end = min(end or series.last_day, series.last_day)
+
+    result = resample(series, start, end, freq)
+    if window:
+        for point in result:
+            # Trailing N-day average ending on the bucket's last day
+            total, count = series.trailing(date.fromisoformat(point["end"]), window)
+            point["moving_average"] = round(total / count, 2) if count > 0 else None
+
+    return dict(
+        freq=freq,
+        start=start.isoformat(),
+        end=end.isoformat(),
+        window=window,
+        data=result,
+    )
+
+
+# Longest moving-average window (days), far beyond any series
+MAX_WINDOW_DAYS = 3660
+
+
+@app.route("/grades/timeseries", methods=["GET"])
+def grades_timeseries():
+    freq = request.args.get("freq", default="day", type=str)
+    if freq not in CALENDAR_BUCKETS and freq != "semester":
+        return jsonify(
+            error="Invalid freq",
+            allowed=[*CALENDAR_BUCKETS, "semester"],
+        ), 400
+
+    needed = ["fact_attendance", "dim_date"]
+    if freq == "semester":
+        needed.append("dim_semesters")
+    missing = ensure_tables(*needed)
+    if missing:
+        return jsonify(error="Required tables not loaded", missing=missing), 500
+
+    window = request.args.get("window", default=None, type=int)
+    if window is not None and not 1 <= window <= MAX_WINDOW_DAYS:
+        return jsonify(error=f"window must be 1 to {MAX_WINDOW_DAYS} days", value=window), 400
+
+    bounds = {}
+    for arg in ("start", "end"):
+        val = request.args.get(arg)
+        try:
+            bounds[arg] = date.fromisoformat(val) if val else None
+        except ValueError:
+            return jsonify(error=f"Invalid {arg} date (expected YYYY-MM-DD)", value=val), 400
+
+    # Only the first call scans the fact table; later ones reuse the prefix sums
+    if grade_series_cached():
+        count_cache_hit("timeseries")
+        scans = ()
+    else:
+        scans = ("fact_attendance",)
+
+    return respond(run_heavy(
+        "grades_timeseries",
+        compute_grades_timeseries,
+        bounds["start"], bounds["end"], freq, window,
+        scans=scans,
+    ))
+
+
+# Pivot dimensions -> fact_attendance label columns
+PIVOT_DIMENSIONS = {
+    "gender": "gender_code",
+    "nationality": "nationality_code",
+    "grade_level": "grade_level_code",
+    "class": "class_code",
+    "semester": "semester_code",
+    "month": "year_month_code",
+    "weekday": "weekday_code",
+}
+# Axes + drill-down dimensions per pivot (each adds a factor to the cube size)
+MAX_PIVOT_AXES = 3
+MAX_PIVOT_DIMS = 4
+# Cubes (and projected views) kept for recently pivoted dimension sets
+PIVOT_CACHE_SIZE = 32
+
+_pivot_cubes: dict[tuple, tuple] = {}
+_pivot_views: dict[tuple, tuple] = {}
+_pivot_cubes_lock = threading.Lock()
+
+
+def pivot_cube_cached(columns: tuple) -> bool:
+    cached = _pivot_cubes.get(columns)
+    return cached is not None and cached[0] is tables["fact_attendance"]
+
+
+def pivot_cube(columns: tuple) -> Cube:
+    """
+    Grade sum / count cube over the given label columns (sorted tuple),
+    built with one scan and then served from memory.
+    """
+    with _pivot_cubes_lock:
+        if pivot_cube_cached(columns):
+            cube = _pivot_cubes.pop(columns)[1]
+            _pivot_cubes[columns] = (tables["fact_attendance"], cube)  # most recent last
+            return cube
+
+    cube = fact_cube(list(columns), "grade")
+    with _pivot_cubes_lock:
+        _pivot_cubes[columns] = (tables["fact_attendance"], cube)
+        while len(_pivot_cubes) > PIVOT_CACHE_SIZE:
+            del _pivot_cubes[next(iter(_pivot_cubes))]
+    return cube
+
+
+def _pivot_label(label):
+    # (year, month) labels read as "2024-05"
+    if isinstance(label, tuple):
+        return f"{label[0]}-{label[1]:02d}"
+    return label
+
+
+def _pivot_rows(cube: Cube, dims: list[str]) -> list[dict]:
+    rows = []
+    for labels, total, n in cube.cells():
+        row = {dim: _pivot_label(label) for dim, label in zip(dims, labels)}
+        row["avg_grade"] = round(total / n, 2)
+        row["num_records"] = n
+        rows.append(row)
+    return rows
+
+
+def pivot_view(dims: tuple, drill: tuple) -> tuple[Cube, dict, int]:
+    """
+    The pivot cube projected onto `dims` with `drill` applied, and its
+    roll-ups by dimension tuple, kept per (dims, drill) so repeated pivots
+    skip the projections. Also returns the cube's skipped rows.
+    """
+    key = (dims, drill)
+    with _pivot_cubes_lock:
+        cached = _pivot_views.pop(key, None)
+        if cached is not None and cached[0] is tables["fact_attendance"]:
+            _pivot_views[key] = cached  # most recent last
+            return cached[1]
+
+    columns = [PIVOT_DIMENSIONS[d] for d in dims]
+    drill_columns = {PIVOT_DIMENSIONS[d]: value for d, value in drill}
+    cube = pivot_cube(tuple(sorted(set(columns) | set(drill_columns))))
+
+    # Drill-down: keep only the cells with the chosen label of each drill
+    # dimension (labels come in as strings, e.g. "5" for grade level 5)
+    fixed = {}
+    for column, value in drill_columns.items():
+        axis = cube.labels[cube.dims.index(column)]
+        fixed[column] = next((l for l in axis if str(_pivot_label(l)) == value), value)
+
+    view = cube.project(columns, fixed)
+    rollups = {tuple(keep): sub for keep, sub in view.rollups()}
+    with _pivot_cubes_lock:
+        _pivot_views[key] = (tables["fact_attendance"], (view, rollups, cube.skipped))
+        while len(_pivot_views) > PIVOT_CACHE_SIZE:
+            del _pivot_views[next(iter(_pivot_views))]
+    return view, rollups, cube.skipped
+
+
+def compute_grades_pivot(dims: tuple, drill: tuple) -> dict:
+    columns = [PIVOT_DIMENSIONS[d] for d in dims]
+    view, rollups, skipped = pivot_view(dims, drill)
+    subtotals = {
+        ",".join(dims[columns.index(c)] for c in keep): _pivot_rows(sub, [dims[columns.index(c)] for c in keep])
+        for keep, sub in rollups.items()
+    }
+    # Labels present along each axis: its one-dimension roll-up
+    labels = {
+        dim: [_pivot_label(l) for (l,), _, _ in rollups.get((column,), view).cells()]
+        for dim, column in zip(dims, columns)
+    }
+    count = view.total_count
+
+    return dict(
+        dims=list(dims),
+        drill=dict(drill),
+        labels=labels,
+        cells=_pivot_rows(view, list(dims)),
+        subtotals=subtotals,
+        total={
+            "avg_grade": round(view.total_sum / count, 2) if count > 0 else None,
+            "num_records": count,
+        },
+        skipped=skipped,
+    )
+
+
+@app.route("/grades/pivot", methods=["GET"])
+def grades_pivot():
+    missing = ensure_tables("fact_attendance", "dim_students", "dim_classes", "dim_semesters", "dim_date")
+    if missing:
+        return jsonify(error="Required tables not loaded", missing=missing), 500
+
+    # ?dims=gender,grade_level,semester  &drill=nationality:Indian (repeatable)
+    dims = [d.strip() for d in request.args.get("dims", "").split(",") if d.strip()]
+    drill = []
+    for arg in request.args.getlist("drill"):
+        dim, sep, value = arg.partition(":")
+        if not sep:
+            return jsonify(error="drill must look like dimension:value", value=arg), 400
+        drill.append((dim.strip(), value))
+
+    unknown = [d for d in dims + [d for d, _ in drill] if d not in PIVOT_DIMENSIONS]
+    if unknown:
+        return jsonify(error="Unknown pivot dimension", unknown=unknown, allowed=list(PIVOT_DIMENSIONS)), 400
+    all_dims = dims + [d for d, _ in drill]
+    if not 1 <= len(dims) <= MAX_PIVOT_AXES or len(set(all_dims)) != len(all_dims):
+        return jsonify(
+            error=f"dims must list 1 to {MAX_PIVOT_AXES} distinct dimensions, none of them drilled",
+        ), 400
+    if len(all_dims) > MAX_PIVOT_DIMS:
+        return jsonify(error=f"At most {MAX_PIVOT_DIMS} dimensions across dims and drill"), 400
+
+    # The cube for this dimension set is built once, later pivots reuse it
+    columns = tuple(sorted(PIVOT_DIMENSIONS[d] for d in all_dims))
+    if pivot_cube_cached(columns):
+        count_cache_hit("pivot")
+        scans = ()
+    else:
+        scans = ("fact_attendance",)
+
+    return jsonify(run_heavy(
+        "grades_pivot",
+        compute_grades_pivot,
+        tuple(dims), tuple(drill),
+        scans=scans,
+    ))
+
+
+def compute_attendance_by_month() -> dict:
+    # year_month_code follows (year, month) order
+    per_month, _ = fact_groups("year_month_code")
     
     result = []
-    for (year, month), count in sorted(count_by_month.items()):
+    for (year, month), _, count in per_month:
         result.append({
             "year": year,
             "month": month,
@@ -552,31 +1798,21 @@ def attendance_by_month():
             "count": count
         })
     
-    return jsonify(data=result)
+    return dict(data=result)
 
 
-@app.route("/attendance/by-weekday", methods=["GET"])
-def attendance_by_weekday():
+@app.route("/attendance/by-month", methods=["GET"])
+def attendance_by_month():
     missing = ensure_tables("fact_attendance", "dim_date")
     if missing:
         return jsonify(error="Required tables not loaded", missing=missing), 500
-    
-    fact = tables["fact_attendance"]
-    dates = tables["dim_date"]
-    
-    weekday_by_key: dict[int, str] = {}
-    for d in dates:
-        dk = d.get("date_key")
-        if isinstance(dk, int):
-            weekday_by_key[dk] = d.get("day_of_week") or "Unknown"
 
-    count_by_weekday: defaultdict[str, int] = defaultdict(int)
-    
-    for row in fact:
-        dk = row.get("date_key")
-        if isinstance(dk, int):
-            weekday = weekday_by_key.get(dk, "Unknown")
-            count_by_weekday[weekday] += 1
+    return jsonify(run_heavy("attendance_by_month", compute_attendance_by_month, scans=("fact_attendance",)))
+
+
+def compute_attendance_by_weekday() -> dict:
+    per_weekday, _ = fact_groups("weekday_code")
+    count_by_weekday = {weekday: n for weekday, _, n in per_weekday}
 
     weekday_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
     result = []
@@ -594,40 +1830,30 @@ def attendance_by_weekday():
                 "count": count
             })
     
-    return jsonify(data=result)
+    return dict(data=result)
 
 
-@app.route("/attendance/by-semester", methods=["GET"])
-def attendance_by_semester():
-    missing = ensure_tables("fact_attendance", "dim_semesters")
+@app.route("/attendance/by-weekday", methods=["GET"])
+def attendance_by_weekday():
+    missing = ensure_tables("fact_attendance", "dim_date")
     if missing:
         return jsonify(error="Required tables not loaded", missing=missing), 500
-    
-    fact = tables["fact_attendance"]
-    semesters = tables["dim_semesters"]
-    
-    name_by_key: dict[int, str] = {}
-    for s in semesters:
-        sk = s.get("semester_key")
-        if isinstance(sk, int):
-            name_by_key[sk] = s.get("semester_name") or f"Semester {sk}"
-    
-    count_by_semester: defaultdict[str, int] = defaultdict(int)
-    null_count = 0
-    
-    for row in fact:
-        sk = row.get("semester_key")
-        if sk is None or (isinstance(sk, str) and sk == "\\N"):
-            null_count += 1
-        elif isinstance(sk, int):
-            semester_name = name_by_key.get(sk, f"Semester {sk}")
-            count_by_semester[semester_name] += 1
+
+    return jsonify(run_heavy("attendance_by_weekday", compute_attendance_by_weekday, scans=("fact_attendance",)))
+
+
+def compute_attendance_by_semester() -> dict:
+    # Rows with a NULL (e.g. "\\N") semester_key are reported as skipped;
+    # grade stats come from the same scan (rows without a grade are counted
+    # but not part of the stats)
+    per_semester, null_count = grade_stats_by("semester_code")
     
     result = []
-    for semester_name, count in sorted(count_by_semester.items()):
+    for semester_name, count, total_grade, stats in per_semester:
         result.append({
             "semester_name": semester_name,
-            "count": count
+            "count": count,
+            **grade_stats_fields(total_grade, stats),
         })
     
     if null_count > 0:
@@ -636,16 +1862,19 @@ def attendance_by_semester():
             "count": null_count
         })
     
-    return jsonify(data=result)
+    return dict(data=result)
 
 
-@app.route("/classes/students-per-class", methods=["GET"])
-def classes_students_per_class():
-    missing = ensure_tables("dim_students", "dim_classes")
+@app.route("/attendance/by-semester", methods=["GET"])
+def attendance_by_semester():
+    missing = ensure_tables("fact_attendance", "dim_semesters")
     if missing:
         return jsonify(error="Required tables not loaded", missing=missing), 500
-    
-    students = tables["dim_students"]
+
+    return jsonify(run_heavy("attendance_by_semester", compute_attendance_by_semester, scans=("fact_attendance",)))
+
+
+def compute_classes_students_per_class() -> dict:
     classes = tables["dim_classes"]
 
     name_by_class_id: dict[int, str] = {}
@@ -655,11 +1884,12 @@ def classes_students_per_class():
         if isinstance(cid, int):
             name_by_class_id[cid] = cname or f"Class {cid}"
     
+    # Roster sizes come straight from the class index when it is loaded
+    counts = class_rosters.counts() if class_rosters is not None else student_counts("class_id")
     count_by_class: defaultdict[int, int] = defaultdict(int)
-    for row in students:
-        cid = row.get("class_id")
-        if isinstance(cid, int):
-            count_by_class[cid] += 1
+    for cid, n in counts:
+        if cid is not None:
+            count_by_class[cid] += n
     
     result = []
     for cid, count in sorted(count_by_class.items()):
@@ -669,7 +1899,137 @@ def classes_students_per_class():
             "student_count": count
         })
     
-    return jsonify(data=result)
+    return dict(data=result)
+
+
+@app.route("/classes/students-per-class", methods=["GET"])
+def classes_students_per_class():
+    missing = ensure_tables("dim_students", "dim_classes")
+    if missing:
+        return jsonify(error="Required tables not loaded", missing=missing), 500
+
+    scans = ("dim_classes",) if class_rosters is not None else ("dim_students", "dim_classes")
+    return respond(run_heavy("classes_students_per_class", compute_classes_students_per_class, scans=scans))
+
+
+# Trend buckets for /classes/<class_id> (default)
+CLASS_TREND_FREQ = "month"
+
+
+def compute_class_detail(class_id: int, page: int, per_page: int, freq: str):
+    """
+    One class: its roster page, grade statistics and grade / attendance
+    trend, following the class indexes. None if the class is unknown.
+    """
+    class_rows = [c for c in tables["dim_classes"] if c.get("class_id") == class_id]
+    class_keys = sorted({c["class_key"] for c in class_rows if c.get("class_key") is not None})
+    start = (page - 1) * per_page
+    end = start + per_page
+
+    if sql_store is not None:
+        roster_size, roster = sql_store.class_roster(class_id, start, end)
+        grade_counts, per_date = sql_store.class_facts(class_keys)
+    else:
+        students = tables["dim_students"]
+        fact = tables["fact_attendance"]
+        members = class_rosters.rows_of(class_id)
+        roster_size = len(members)
+        roster = [students.row(i) for i in members[start:end]]
+
+        grades = fact.columns["grade"]
+        dates = fact.columns["date_code"]
+        tally: Counter = Counter()
+        # date -> [grade sum, graded rows, rows]
+        date_totals: defaultdict[int, list] = defaultdict(lambda: [0, 0, 0])
+        for key in class_keys:
+            rows = class_fact_rows.rows_of(key)
+            tally.update(grades[i] for i in rows)
+            for i in rows:
+                day = dates[i]
+                if day == NULL:
+                    continue
+                entry = date_totals[day]
+                entry[2] += 1
+                if grades[i] != NULL:
+                    entry[0] += grades[i]
+                    entry[1] += 1
+        grade_counts = [(None if grade == NULL else grade, n) for grade, n in tally.items()]
+        labels = fact.dictionaries["date_code"]
+        per_date = [(labels[day], *totals) for day, totals in date_totals.items()]
+
+    if not class_rows and not roster_size:
+        return None
+
+    # Grade stats from the (grade, rows) histogram, as in grade_stats_by
+    records = 0
+    grade_total = 0
+    stats = RunningStats()
+    for grade, n in grade_counts:
+        records += n
+        if grade is not None:
+            grade_total += grade * n
+            stats.merge(RunningStats.of_constant(grade, n))
+
+    # Average grade over the graded rows; attendance counts every dated row
+    grade_points, attendance_points = [], []
+    for day, total, graded, rows in per_date:
+        try:
+            day = date.fromisoformat(day)
+        except ValueError:
+            continue
+        grade_points.append((day, total, graded))
+        attendance_points.append((day, 0, rows))
+    series = PrefixSeries.from_points(grade_points)
+    attendance = PrefixSeries.from_points(attendance_points)
+    trend = resample(series, attendance.first_day, attendance.last_day, freq) if attendance.days else []
+    for point in trend:
+        point["attendance"] = attendance.total(date.fromisoformat(point["start"]), date.fromisoformat(point["end"]))[1]
+
+    first = class_rows[0] if class_rows else {}
+    return dict(
+        class_id=class_id,
+        class_name=first.get("class_name") or f"Class {class_id}",
+        grade_level=first.get("grade_level"),
+        class_keys=class_keys,
+        roster_size=roster_size,
+        data=roster,
+        pagination={
+            "page": page,
+            "per_page": per_page,
+            "total": roster_size,
+            "total_pages": (roster_size + per_page - 1) // per_page if roster_size > 0 else 0,
+        },
+        grades={"records": records, **grade_stats_fields(grade_total, stats)},
+        trend={"freq": freq, "data": trend},
+    )
+
+
+@app.route("/classes/<int:class_id>", methods=["GET"])
+def class_detail(class_id: int):
+    freq = request.args.get("freq", default=CLASS_TREND_FREQ, type=str)
+    if freq not in CALENDAR_BUCKETS and freq != "semester":
+        return jsonify(
+            error="Invalid freq",
+            allowed=[*CALENDAR_BUCKETS, "semester"],
+        ), 400
+
+    page = request.args.get("page", default=1, type=int)
+    per_page = request.args.get("per_page", default=100, type=int)
+    if page < 1 or per_page < 1:
+        return jsonify(error="page and per_page must be positive"), 400
+
+    needed = ["dim_classes", "dim_students", "fact_attendance", "dim_date"]
+    if freq == "semester":
+        needed.append("dim_semesters")
+    missing = ensure_tables(*needed)
+    if missing:
+        return jsonify(error="Required tables not loaded", missing=missing), 500
+
+    # Only the class's index entries are read (no table scan)
+    result = run_heavy("class_detail", compute_class_detail, class_id, page, per_page, freq)
+    if result is None:
+        return jsonify(error="Class not found", class_id=class_id), 404
+    return respond(result)
 
 
 @app.route("/classes/by-grade-level", methods=["GET"])
@@ -679,6 +2039,7 @@ def classes_by_grade_level():
         return jsonify(error="Required tables not loaded", missing=missing), 500
     
     classes = tables["dim_classes"]
+    count_scanned(len(classes))
 
     classes_by_grade: defaultdict[int, list] = defaultdict(list)
     for row in classes:
@@ -708,6 +2069,7 @@ def semesters_list():
         return jsonify(error="Required tables not loaded", missing=missing), 500
     
     semesters = tables["dim_semesters"]
+    count_scanned(len(semesters))
     
     result = []
     for row in semesters:
@@ -725,6 +2087,8 @@ def semesters_list():
 
 
 if __name__ == "__main__":
-    # Run on localhost:5000 so UI can call it
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # Development server on localhost:5000 so UI can call it.
+    # The reloader re-imports this module (loading every table twice), so
+    # production should use `python backend/serve.py` instead.
+    app.run(host="0.0.0.0", port=5000, debug=env_flag("API_DEBUG", True))
 
@@ -0,0 +1,367 @@
+import re
+import sys
+from array import array
+from datetime import date
+
+# -----------------------------------------------------------------------------
+# Column-oriented in-memory table
+# -----------------------------------------------------------------------------
+# Packed columns are 32-bit int arrays; missing / unparsable values are stored
+# as NULL and surface as None when rows are materialised, unless the CSV held
+# something the old row dicts kept (see original_value).
+INT_TYPECODE = "i"
+NULL = -(2 ** 31)
+
+# Column kinds used in table schemas
+INT = "int"            # packed int32
+CATEGORY = "category"  # low-cardinality string, dictionary-encoded to int32 codes
+DATE = "date"          # ISO date, packed as int32 day number (date.toordinal)
+STR = "str"            # free text, kept as interned Python strings
+
+PACKED_KINDS = (INT, CATEGORY, DATE)
+
+
+def parse_int(val) -> int:
+    if val is None or val == "":
+        return NULL
+    try:
+        n = int(val)
+    except ValueError:
+        return NULL
+    if not NULL < n < 2 ** 31:
+        return NULL
+    return n
+
+
+def parse_date(val) -> int:
+    if not val:
+        return NULL
+    try:
+        return date.fromisoformat(val).toordinal()
+    except ValueError:
+        return NULL
+
+
+def original_value(kind: str, val):
+    """
+    What a CSV value packed as NULL materialised as in the old list-of-dicts
+    tables, or None if that was None too: blank labels and dates stay "",
+    unparsable dates keep their text, ints outside int32 stay ints.
+    """
+    if val is None:
+        return None
+    if kind == INT:
+        try:
+            return int(val)
+        except ValueError:
+            return None
+    return sys.intern(val)
+
+
+def format_date(day_number: int):
+    if day_number == NULL:
+        return None
+    return date.fromordinal(day_number).isoformat()
+
+
+def map_column(keys, lookup: dict, default: int = NULL) -> array:
+    """
+    Map every value of a packed key column through `lookup`.
+    NULL keys stay NULL; keys missing from lookup become `default`.
+    """
+    full = {k: lookup.get(k, default) for k in set(keys)}
+    full[NULL] = NULL
+    return array(INT_TYPECODE, map(full.__getitem__, keys))
+
+
+_NONZERO_BYTE = re.compile(rb"[^\x00]")
+# Set bit positions of every byte value
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+class Bitmap:
+    """
+    A set of row numbers in [0, size) stored as one bit per row.
+    """
+
+    __slots__ = ("size", "bits")
+
+    def __init__(self, size: int, bits: bytearray | None = None):
+        self.size = size
+        self.bits = bits if bits is not None else bytearray((size + 7) // 8)
+
+    @classmethod
+    def of_value(cls, col, value: int = NULL) -> "Bitmap":
+        """
+        Rows of a packed column equal to `value` (NULL by default).
+        """
+        rows = cls(len(col))
+        if not isinstance(col, array):
+            for i, v in enumerate(col):
+                if v == value:
+                    rows.add(i)
+            return rows
+        # array.index searches in C; cheap when matches are rare
+        i = -1
+        try:
+            while True:
+                i = col.index(value, i + 1)
+                rows.add(i)
+        except ValueError:
+            pass
+        return rows
+
+    def add(self, i: int) -> None:
+        self.bits[i >> 3] |= 1 << (i & 7)
+
+    def __contains__(self, i: int) -> bool:
+        return bool(self.bits[i >> 3] >> (i & 7) & 1)
+
+    def __len__(self) -> int:
+        return int.from_bytes(self.bits, "little").bit_count()
+
+    def __bool__(self) -> bool:
+        return self.bits.count(0) != len(self.bits)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        if self.size != other.size:
+            raise ValueError(f"bitmap sizes differ: {self.size} != {other.size}")
+        merged = int.from_bytes(self.bits, "little") | int.from_bytes(other.bits, "little")
+        return Bitmap(self.size, bytearray(merged.to_bytes(len(self.bits), "little")))
+
+    def rows(self, lo: int = 0, hi: int | None = None) -> list[int]:
+        """
+        Set row numbers in [lo, hi), ascending.
+        """
+        hi = self.size if hi is None else min(hi, self.size)
+        if lo >= hi:
+            return []
+        # Only the non-zero bytes are expanded into row numbers
+        rows = [
+            (match.start() << 3) + bit
+            for match in _NONZERO_BYTE.finditer(self.bits, lo >> 3, (hi + 7) >> 3)
+            for bit in _BYTE_BITS[self.bits[match.start()]]
+        ]
+        # The first / last byte may stick out of [lo, hi)
+        if rows and (rows[0] < lo or rows[-1] >= hi):
+            rows = [i for i in rows if lo <= i < hi]
+        return rows
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+
+def find_rows(keys, wanted: set) -> Bitmap:
+    """
+    Rows of a packed column whose value is in `wanted`.
+    """
+    rows = Bitmap(len(keys))
+    if wanted:
+        add = rows.add
+        for i, k in enumerate(keys):
+            if k in wanted:
+                add(i)
+    return rows
+
+
+class ColumnTable:
+    """
+    A table stored as one sequence per column instead of one dict per row.
+
+    `schema` maps each column to load to its kind (INT, CATEGORY, DATE or
+    STR); CSV columns not in the schema are dropped. Behaves enough like the
+    old list-of-dicts for the generic helpers (len(), truthiness, slicing /
+    iteration yield row dicts), while scans work on the packed columns.
+    """
+
+    def __init__(self, name: str, schema: dict[str, str], header=None):
+        self.name = name
+        self.schema = dict(schema)
+        self.fields = list(self.schema)
+        # Columns stored as int32 arrays (ints, category codes, day numbers)
+        self.int_fields = [f for f, kind in self.schema.items() if kind in PACKED_KINDS]
+        self.columns: dict = {
+            f: array(INT_TYPECODE) if f in self.int_fields else []
+            for f in self.fields
+        }
+        # Category dictionaries: code -> label and label -> code
+        self.dictionaries: dict[str, list] = {
+            f: [] for f, kind in self.schema.items() if kind == CATEGORY
+        }
+        self._codes: dict[str, dict[str, int]] = {f: {} for f in self.dictionaries}
+        # Packed columns computed after load (not part of materialised rows)
+        self.derived: list[str] = []
+        # Per packed column: rows holding NULL (see index_nulls)
+        self.null_rows: dict[str, Bitmap] = {}
+        # Per schema packed column: row -> original_value of its NULL cells.
+        # Only materialised rows show these; scans see NULL.
+        self.originals: dict[str, dict[int, object]] = {f: {} for f in self.int_fields}
+
+        # Per schema column: (position in a CSV record, append, parse, field).
+        # Columns missing from the header get position None.
+        header = list(header) if header is not None else self.fields
+        self._appenders = [
+            (
+                header.index(f) if f in header else None,
+                self.columns[f].append,
+                self._parser(f),
+                f,
+            )
+            for f in self.fields
+        ]
+        self._length = 0
+        self._ranges: dict = {}
+
+    # -- building -------------------------------------------------------------
+    def _parser(self, field: str):
+        kind = self.schema[field]
+        if kind == INT:
+            return parse_int
+        if kind == DATE:
+            return parse_date
+        if kind == CATEGORY:
+            codes = self._codes[field]
+            labels = self.dictionaries[field]
+
+            def encode(val) -> int:
+                if not val:
+                    return NULL
+                code = codes.get(val)
+                if code is None:
+                    code = len(labels)
+                    codes[val] = code
+                    labels.append(sys.intern(val))
+                return code
+
+            return encode
+        return lambda val: sys.intern(val) if val is not None else None
+
+    def append_record(self, record: list) -> None:
+        """
+        Append one CSV record (values in header order).
+        """
+        n = len(record)
+        for pos, append, parse, field in self._appenders:
+            val = record[pos] if pos is not None and pos < n else None
+            packed = parse(val)
+            append(packed)
+            if packed == NULL and val is not None:
+                original = original_value(self.schema[field], val)
+                if original is not None:
+                    self.originals[field][self._length] = original
+        self._length += 1
+        if self._ranges:
+            self._ranges.clear()
+        if self.null_rows:
+            self.null_rows.clear()
+
+    def add_derived(self, field: str, values: array, labels=None) -> None:
+        """
+        Attach a packed column computed from other data (e.g. a resolved
+        foreign key). `labels` optionally decodes its values: code -> label.
+        Derived columns are scanned like any other but are not included in
+        materialised rows.
+        """
+        if len(values) != self._length:
+            raise ValueError(f"{field}: expected {self._length} values, got {len(values)}")
+        self.columns[field] = values
+        if field not in self.int_fields:
+            self.int_fields.append(field)
+            self.derived.append(field)
+        if labels is not None:
+            self.dictionaries[field] = list(labels)
+            self._codes[field] = {label: code for code, label in enumerate(labels)}
+        self._ranges.pop(field, None)
+        self.null_rows.pop(field, None)
+
+    def index_nulls(self) -> None:
+        """
+        Record the NULL rows of every packed column once, so scans over
+        columns without any can skip the per-row NULL check.
+        """
+        for field in self.int_fields:
+            if field not in self.null_rows:
+                self.null_rows[field] = Bitmap.of_value(self.columns[field])
+
+    # -- categories -----------------------------------------------------------
+    def code_of(self, field: str, label: str):
+        """
+        Dictionary code of a category label, or None if it never occurs.
+        """
+        return self._codes[field].get(label)
+
+    def label_of(self, field: str, code: int):
+        if code == NULL:
+            return None
+        return self.dictionaries[field][code]
+
+    # -- row access -----------------------------------------------------------
+    def __len__(self) -> int:
+        return self._length
+
+    def row(self, i: int) -> dict:
+        out = {}
+        for field in self.fields:
+            val = self.columns[field][i]
+            kind = self.schema[field]
+            if val == NULL and kind in PACKED_KINDS:
+                val = self.originals[field].get(i)
+            elif kind == CATEGORY:
+                val = self.label_of(field, val)
+            elif kind == DATE:
+                val = format_date(val)
+            out[field] = val
+        return out
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self.row(i) for i in range(*idx.indices(self._length))]
+        if idx < 0:
+            idx += self._length
+        if not 0 <= idx < self._length:
+            raise IndexError("row index out of range")
+        return self.row(idx)
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self.row(i)
+
+    # -- introspection --------------------------------------------------------
+    def column_range(self, field: str):
+        """
+        (min, max) of a packed column ignoring NULLs, or None if all NULL.
+        """
+        if field not in self._ranges:
+            self._ranges[field] = self._compute_range(field)
+        return self._ranges[field]
+
+    def _compute_range(self, field: str):
+        col = self.columns[field]
+        if not col:
+            return None
+        hi = max(col)
+        if hi == NULL:
+            return None
+        lo = min(col)
+        if lo == NULL:
+            # NULL is the smallest representable value; only then filter
+            lo = min(v for v in col if v != NULL)
+        return lo, hi
+
+    def nbytes(self) -> int:
+        total = 0
+        for field, col in self.columns.items():
+            if field in self.int_fields:
+                total += memoryview(col).nbytes
+            else:
+                # Interned strings are shared; count each distinct one once
+                distinct = {id(v): v for v in col}.values()
+                total += sys.getsizeof(col) + sum(sys.getsizeof(v) for v in distinct)
+        for labels in self.dictionaries.values():
+            total += sys.getsizeof(labels) + sum(sys.getsizeof(v) for v in labels)
+        total += sum(nulls.nbytes for nulls in self.null_rows.values())
+        for kept in self.originals.values():
+            if kept:
+                total += sys.getsizeof(kept) + sum(sys.getsizeof(v) for v in set(kept.values()))
+        return total
@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+# -----------------------------------------------------------------------------
+# Bounded compute pool with single-flight coalescing of identical requests
+# -----------------------------------------------------------------------------
+
+
+class ComputeUnavailable(Exception):
+    """
+    Raised when the pool cannot take (or finish) work in time.
+    The API turns this into 503 + Retry-After.
+    """
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ComputePool:
+    """
+    Runs heavy aggregations off the request threads.
+
+    - At most `workers` computations run at once and at most `max_queue`
+      more wait for a worker; anything beyond that is rejected immediately.
+    - Calls with the same key while one is already in flight do not start a
+      new computation: they wait for the running one and share its result.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 32, timeout: float = 30.0,
+                 retry_after: int = 1):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="compute")
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._inflight: dict = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, fn, *args):
+        """
+        Compute fn(*args), coalesced on `key`.
+        Returns (result, shared) where shared is True if this call joined a
+        computation started by someone else.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            shared = future is not None
+            if not shared:
+                if not self._slots.acquire(blocking=False):
+                    raise ComputeUnavailable("Compute queue full", self.retry_after)
+                future = self._executor.submit(fn, *args)
+                self._inflight[key] = future
+
+        if not shared:
+            # Outside the lock: the callback runs inline if fn already finished
+            future.add_done_callback(lambda f, k=key: self._finished(k, f))
+
+        try:
+            return future.result(timeout=self.timeout), shared
+        except FutureTimeout:
+            raise ComputeUnavailable("Computation timed out", self.retry_after) from None
+
+    def _finished(self, key, future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            inflight = len(self._inflight)
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "inflight": inflight,
+        }
@@ -0,0 +1,85 @@
+import json
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: only needed for format=arrow
+    pa = None
+
+# -----------------------------------------------------------------------------
+# Columnar response encodings for list endpoints
+# -----------------------------------------------------------------------------
+# A list of row objects repeats every key in every row. The columnar form
+# sends each column once as an array; string columns with few distinct values
+# are dictionary-encoded (codes + one list of labels).
+
+ARROW_AVAILABLE = pa is not None
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def to_columns(rows: list[dict]) -> dict[str, list]:
+    """
+    Row dicts -> column name -> values (keys missing from a row give None).
+    Columns keep first-seen key order.
+    """
+    names: dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            names.setdefault(key, None)
+    return {name: [row.get(name) for row in rows] for name in names}
+
+
+def is_categorical(values: list) -> bool:
+    """
+    Strings (or None) with at most half as many distinct values as rows.
+    """
+    if len(values) < 2 or not all(v is None or isinstance(v, str) for v in values):
+        return False
+    return len(set(values)) <= len(values) // 2
+
+
+def dictionary_encode(values: list) -> tuple[list, list]:
+    """
+    (codes, labels); None stays None.
+    """
+    codes: dict = {}
+    encoded = [
+        None if v is None else codes.setdefault(v, len(codes))
+        for v in values
+    ]
+    return encoded, list(codes)
+
+
+def columnar_json(rows: list[dict]) -> dict:
+    """
+    {"length": n, "columns": {name: values}, "dictionaries": {name: labels}}
+    where a dictionary-encoded column holds codes into its labels.
+    """
+    columns = to_columns(rows)
+    dictionaries = {}
+    for name, values in columns.items():
+        if is_categorical(values):
+            columns[name], dictionaries[name] = dictionary_encode(values)
+    return {"length": len(rows), "columns": columns, "dictionaries": dictionaries}
+
+
+def arrow_ipc(rows: list[dict], metadata: dict | None = None) -> bytes:
+    """
+    Arrow IPC stream of the rows (categorical columns as dictionary
+    arrays). `metadata` (e.g. pagination) is attached to the schema as JSON.
+    Requires pyarrow.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+
+    arrays = {}
+    for name, values in to_columns(rows).items():
+        array = pa.array(values)
+        arrays[name] = array.dictionary_encode() if is_categorical(values) else array
+    table = pa.table(arrays)
+    if metadata:
+        table = table.replace_schema_metadata({"response": json.dumps(metadata)})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
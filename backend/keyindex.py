@@ -0,0 +1,79 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import accumulate
+
+from columnar import INT_TYPECODE, NULL
+
+# -----------------------------------------------------------------------------
+# Row index over a packed key column (e.g. class -> its students / fact rows)
+# -----------------------------------------------------------------------------
+# All row numbers are stored in one array grouped by key (compressed sparse
+# row layout), with the start of each key's group in a second array. Keys get
+# one slot each in sorted order, however far apart their values are; looking
+# up a key is a binary search, its rows a slice and its size a subtraction.
+
+
+class KeyIndex:
+    """
+    keys:   distinct keys, ascending; key keys[i]'s rows are rows[starts[i]:starts[i + 1]]
+    starts: len(keys) + 1 group boundaries into rows
+    rows:   row numbers grouped by key, ascending within a key
+    NULL keys are not indexed.
+    """
+
+    def __init__(self, keys: array, starts: array, rows: array):
+        self.keys = keys
+        self.starts = starts
+        self.rows = rows
+
+    @classmethod
+    def build(cls, keys) -> "KeyIndex":
+        counts = Counter(keys)
+        counts.pop(NULL, None)
+        distinct = array(INT_TYPECODE, sorted(counts))
+        starts = array(INT_TYPECODE, accumulate((counts[k] for k in distinct), initial=0))
+
+        # Counting sort: drop each row number into its key's next free slot
+        slot_of = {k: slot for slot, k in enumerate(distinct)}
+        rows = array(INT_TYPECODE, [0]) * starts[-1]
+        fill = list(starts[:-1])
+        for i, k in enumerate(keys):
+            if k != NULL:
+                slot = slot_of[k]
+                rows[fill[slot]] = i
+                fill[slot] += 1
+        return cls(distinct, starts, rows)
+
+    def _slot(self, key: int) -> int | None:
+        i = bisect_left(self.keys, key)
+        return i if i < len(self.keys) and self.keys[i] == key else None
+
+    def __contains__(self, key: int) -> bool:
+        return self._slot(key) is not None
+
+    def count(self, key: int) -> int:
+        i = self._slot(key)
+        if i is None:
+            return 0
+        return self.starts[i + 1] - self.starts[i]
+
+    def rows_of(self, key: int) -> array:
+        """
+        Row numbers with this key, ascending (empty if it never occurs).
+        """
+        i = self._slot(key)
+        if i is None:
+            return self.rows[:0]
+        return self.rows[self.starts[i]:self.starts[i + 1]]
+
+    def counts(self):
+        """
+        (key, rows) for every key that occurs, in key order.
+        """
+        for i, key in enumerate(self.keys):
+            yield key, self.starts[i + 1] - self.starts[i]
+
+    @property
+    def nbytes(self) -> int:
+        return memoryview(self.keys).nbytes + memoryview(self.starts).nbytes + memoryview(self.rows).nbytes
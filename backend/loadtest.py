@@ -0,0 +1,388 @@
+"""
+HTTP load generator that replays dashboard traffic against the API.
+
+Runs one step per concurrency level: that many client threads replay a
+weighted mix of the dashboard routes (KPIs, grade and attendance charts,
+paginated / searched student lists) for a fixed time, optionally paced to
+a target request rate. Each step reports throughput, latency percentiles
+and error rate, so the saturation point shows up as the step where p99 or
+errors jump while throughput stops growing.
+
+    python backend/loadtest.py --url http://localhost:5000 --concurrency 1,10,50,200
+    python backend/loadtest.py --start-server --workers 4 --rate 300
+
+Only the standard library is used. The client itself is Python threads,
+so at high concurrency check that it isn't the bottleneck (run it on
+another machine or compare with fewer threads at the same rate).
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import quote, urlsplit
+
+# Dashboard route mix: (weight, path). Student list paths are generated per
+# request (see student_list_path). Weights follow what a dashboard page load
+# fetches: a handful of KPIs and charts, then list / search interactions.
+ROUTE_MIX = [
+    (3, "/kpis/total-classes"),
+    (3, "/kpis/total-attendance"),
+    (3, "/kpis/average-grade"),
+    (3, "/students/count"),
+    (2, "/students/by-nationality"),
+    (2, "/students/by-grade-level"),
+    (3, "/grades/by-gender"),
+    (3, "/grades/by-class"),
+    (2, "/grades/distribution"),
+    (2, "/grades/trend-by-date"),
+    (2, "/attendance/by-month"),
+    (2, "/attendance/by-weekday"),
+    (2, "/attendance/by-semester"),
+    (1, "/classes/students-per-class"),
+    (1, "/classes/by-grade-level"),
+    (6, "/students/list"),
+    (4, "/students/list?search"),
+]
+
+# Search terms used when the server can't be asked for real names
+FALLBACK_SEARCHES = ["a", "al", "sa", "mo", "fa", "ah"]
+
+STUDENT_PAGE_SIZES = [20, 50, 100]
+STUDENT_MAX_PAGE = 100
+READY_TIMEOUT = 600.0
+PERCENTILES = (50, 95, 99)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay dashboard traffic against the school API")
+    parser.add_argument("--url", default=os.environ.get("API_URL", "http://localhost:5000"))
+    parser.add_argument(
+        "--concurrency",
+        default="1,10,50,100,200",
+        help="comma-separated client counts, one step each (default: 1,10,50,100,200)",
+    )
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per step")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each step")
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0.0,
+        help="target requests/second per step, shared by all clients (default: as fast as possible)",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--per-route", action="store_true", help="also print latencies per route")
+    parser.add_argument("--json", dest="json_path", help="write the step reports to this file")
+    parser.add_argument(
+        "--start-server",
+        action="store_true",
+        help="start backend/serve.py on the --url port and stop it afterwards",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="serve.py workers (with --start-server)")
+    parser.add_argument(
+        "--server-log",
+        default=os.devnull,
+        help="file for the started server's output, incl. its access log (default: discarded)",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        args.concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    except ValueError:
+        parser.error("--concurrency must be comma-separated integers")
+    if not args.concurrency or min(args.concurrency) < 1:
+        parser.error("--concurrency values must be >= 1")
+    return args
+
+
+# -----------------------------------------------------------------------------
+# HTTP client
+# -----------------------------------------------------------------------------
+
+class Client:
+    """
+    One keep-alive connection; reconnects after a failure.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.conn = None
+
+    def get(self, path: str) -> tuple[int, bytes]:
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            self.conn.request("GET", path)
+            response = self.conn.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+        if response.will_close:
+            self.close()
+        return response.status, body
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def wait_until_ready(client: Client, timeout: float = READY_TIMEOUT) -> None:
+    """
+    Poll /health until every table is loaded.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            status, body = client.get("/health")
+            if status == 200 and json.loads(body).get("ready"):
+                return
+        except (OSError, http.client.HTTPException, ValueError):
+            pass
+        if time.monotonic() > deadline:
+            raise SystemExit(f"[LOADTEST] Server not ready after {timeout:.0f}s")
+        time.sleep(0.5)
+
+
+def sample_searches(client: Client, limit: int = 50) -> list[str]:
+    """
+    Search terms taken from real student names (full names and prefixes).
+    """
+    try:
+        status, body = client.get(f"/students/list?per_page={limit}&page=2")
+        rows = json.loads(body)["data"] if status == 200 else []
+    except (OSError, http.client.HTTPException, ValueError, KeyError):
+        rows = []
+
+    searches = set()
+    for row in rows:
+        for field in ("first_name", "last_name"):
+            name = row.get(field)
+            if name:
+                searches.add(name)
+                searches.add(name[:2])
+    return sorted(searches) or FALLBACK_SEARCHES
+
+
+# -----------------------------------------------------------------------------
+# Traffic
+# -----------------------------------------------------------------------------
+
+def student_list_path(rng: random.Random, searches: list[str], search: bool) -> str:
+    per_page = rng.choice(STUDENT_PAGE_SIZES)
+    if search:
+        # Searches mostly look at the first page of results
+        page = 1 if rng.random() < 0.8 else rng.randint(2, 5)
+        return f"/students/list?search={quote(rng.choice(searches))}&page={page}&per_page={per_page}"
+    page = rng.randint(1, STUDENT_MAX_PAGE)
+    return f"/students/list?page={page}&per_page={per_page}"
+
+
+class Traffic:
+    """
+    Draws (route name, request path) pairs from ROUTE_MIX.
+    """
+
+    def __init__(self, searches: list[str]):
+        self.searches = searches
+        self.routes = [path for _, path in ROUTE_MIX]
+        self.weights = [weight for weight, _ in ROUTE_MIX]
+
+    def next(self, rng: random.Random) -> tuple[str, str]:
+        route = rng.choices(self.routes, self.weights)[0]
+        if route.startswith("/students/list"):
+            return route, student_list_path(rng, self.searches, route.endswith("?search"))
+        return route, route
+
+
+class Pacer:
+    """
+    Hands out send times spaced 1/rate apart across all clients. Latency is
+    measured from the scheduled send time, so a server that falls behind is
+    charged for the queueing it causes (no coordinated omission).
+    """
+
+    def __init__(self, rate: float, start: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.start = start
+        self.sent = 0
+        self.lock = threading.Lock()
+
+    def next_slot(self) -> float:
+        if not self.interval:
+            return time.perf_counter()
+        with self.lock:
+            slot = self.start + self.sent * self.interval
+            self.sent += 1
+        delay = slot - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return slot
+
+
+def run_step(host: str, port: int, traffic: Traffic, concurrency: int, args, seed) -> list[tuple]:
+    """
+    Run `concurrency` clients for warmup + duration seconds.
+    Returns (route, status, latency seconds) for the measured requests;
+    status is None for connection errors and timeouts.
+    """
+    start = time.perf_counter()
+    measure_from = start + args.warmup
+    stop_at = measure_from + args.duration
+    pacer = Pacer(args.rate, start)
+    results: list[tuple] = []
+    lock = threading.Lock()
+
+    def worker(index: int) -> None:
+        rng = random.Random(None if seed is None else seed * 1000 + index)
+        client = Client(host, port, args.timeout)
+        local = []
+        try:
+            while True:
+                sent = pacer.next_slot()
+                if sent >= stop_at or time.perf_counter() >= stop_at:
+                    break
+                route, path = traffic.next(rng)
+                try:
+                    status, _ = client.get(path)
+                except (OSError, http.client.HTTPException):
+                    status = None
+                if sent >= measure_from:
+                    local.append((route, status, time.perf_counter() - sent))
+        finally:
+            client.close()
+            with lock:
+                results.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+# -----------------------------------------------------------------------------
+# Reporting
+# -----------------------------------------------------------------------------
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(results: list[tuple], duration: float) -> dict:
+    latencies = sorted(latency for _, _, latency in results)
+    errors = sum(1 for _, status, _ in results if status is None or status >= 400)
+    statuses = Counter("error" if status is None else str(status) for _, status, _ in results)
+    summary = {
+        "requests": len(results),
+        "errors": errors,
+        "error_rate": round(errors / len(results), 4) if results else 0.0,
+        "throughput_rps": round(len(results) / duration, 1) if duration else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(percentile(latencies, pct) * 1000, 1)
+    summary["max_ms"] = round(latencies[-1] * 1000, 1) if latencies else 0.0
+    return summary
+
+
+def step_report(concurrency: int, results: list[tuple], duration: float) -> dict:
+    by_route: dict[str, list] = {}
+    for result in results:
+        by_route.setdefault(result[0], []).append(result)
+    return {
+        "concurrency": concurrency,
+        **summarize(results, duration),
+        "routes": {route: summarize(rows, duration) for route, rows in sorted(by_route.items())},
+    }
+
+
+def print_header() -> None:
+    print(f"{'clients':>8} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8} {'errors':>8}")
+
+
+def print_row(label, summary: dict) -> None:
+    print(f"{label:>8} {summary['requests']:>9} {summary['throughput_rps']:>8} "
+          f"{summary['p50_ms']:>8} {summary['p95_ms']:>8} {summary['p99_ms']:>8} "
+          f"{summary['max_ms']:>8} {summary['error_rate']:>8.2%}")
+
+
+def print_routes(report: dict) -> None:
+    for route, summary in report["routes"].items():
+        print(f"    {route:<32} n={summary['requests']:<6} p50={summary['p50_ms']}ms "
+              f"p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms errors={summary['error_rate']:.2%}")
+
+
+# -----------------------------------------------------------------------------
+# Main
+# -----------------------------------------------------------------------------
+
+def start_server(port: int, workers, log) -> subprocess.Popen:
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "serve.py"),
+               "--host", "127.0.0.1", "--port", str(port)]
+    if workers:
+        command += ["--workers", str(workers)]
+    print(f"[LOADTEST] Starting {' '.join(command)}")
+    return subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    url = urlsplit(args.url)
+    host, port = url.hostname or "localhost", url.port or 80
+
+    server = None
+    if args.start_server:
+        server_log = open(args.server_log, "ab")
+        server = start_server(port, args.workers, server_log)
+    try:
+        probe = Client(host, port, args.timeout)
+        wait_until_ready(probe)
+        traffic = Traffic(sample_searches(probe))
+        probe.close()
+
+        pacing = f"{args.rate:g} req/s" if args.rate > 0 else "unpaced"
+        print(f"[LOADTEST] {args.url}: {len(args.concurrency)} steps of {args.duration:g}s "
+              f"(+{args.warmup:g}s warmup), {pacing}")
+        print_header()
+
+        reports = []
+        for concurrency in args.concurrency:
+            results = run_step(host, port, traffic, concurrency, args, args.seed)
+            report = step_report(concurrency, results, args.duration)
+            reports.append(report)
+            print_row(concurrency, report)
+            if args.per_route:
+                print_routes(report)
+
+        if args.json_path:
+            with open(args.json_path, "w", encoding="utf-8") as f:
+                json.dump({"url": args.url, "rate": args.rate, "duration": args.duration,
+                           "steps": reports}, f, indent=2)
+            print(f"[LOADTEST] Wrote {args.json_path}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+            server_log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+from itertools import combinations, product
+from math import prod
+
+# -----------------------------------------------------------------------------
+# Dense sum / count cubes for pivots (cross-tabs) with roll-up and drill-down
+# -----------------------------------------------------------------------------
+# A cube holds the sum and count of a measure for every combination of the
+# labels of a few dimensions, as flat row-major arrays. Once built (one scan),
+# any cross-tab over a subset of its dimensions, any subtotal and any slice
+# through a fixed label is computed from the cube alone.
+
+
+class Cube:
+    def __init__(self, dims: list[str], labels: list[list], sums: list[int],
+                 counts: list[int], skipped: int = 0):
+        self.dims = list(dims)
+        self.labels = [list(axis) for axis in labels]
+        self.shape = [len(axis) for axis in self.labels]
+        self.sums = sums
+        self.counts = counts
+        self.skipped = skipped
+
+    @classmethod
+    def from_groups(cls, dims: list[str], groups, skipped: int = 0) -> "Cube":
+        """
+        Build from sparse ((label per dim), sum, count) groups. A None
+        label (NULL kept as its own group) sorts last.
+        """
+        groups = list(groups)
+        labels = [
+            sorted({labels[d] for labels, _, _ in groups}, key=lambda l: (l is None, l))
+            for d in range(len(dims))
+        ]
+        positions = [{label: i for i, label in enumerate(axis)} for axis in labels]
+        shape = [len(axis) for axis in labels]
+
+        sums = [0] * prod(shape)
+        counts = [0] * len(sums)
+        for group_labels, total, n in groups:
+            flat = 0
+            for d, label in enumerate(group_labels):
+                flat = flat * shape[d] + positions[d][label]
+            sums[flat] += total
+            counts[flat] += n
+        return cls(dims, labels, sums, counts, skipped)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def _targets(self, strides: list[int], wanted: dict) -> list[int]:
+        """
+        Flat index in a projection of every cell, built axis by axis instead
+        of decoding each cell's coordinates. `strides` is each axis's step in
+        the projection (0 = summed out); cells off a `wanted` (axis ->
+        position) label get a negative index.
+        """
+        skip = -len(self.counts)
+        targets = [0]
+        for axis, (size, stride) in enumerate(zip(self.shape, strides)):
+            steps = [pos * stride for pos in range(size)]
+            if axis in wanted:
+                steps = [step if pos == wanted[axis] else skip for pos, step in enumerate(steps)]
+            targets = [t + step for t in targets for step in steps]
+        return targets
+
+    def project(self, keep: list[str], fixed: dict | None = None) -> "Cube":
+        """
+        Cube over the `keep` dimensions (in that order): other dimensions are
+        summed out (roll-up), except those in `fixed` (dim -> label), which
+        only keep the cells with that label (drill-down). A fixed label the
+        cube has never seen gives an empty result.
+        """
+        fixed = fixed or {}
+        axes = [self.dims.index(d) for d in keep]
+        shape = [self.shape[a] for a in axes]
+        sums = [0] * prod(shape)
+        counts = [0] * len(sums)
+
+        wanted = {}
+        for dim, label in fixed.items():
+            axis = self.dims.index(dim)
+            if label not in self.labels[axis]:
+                return Cube(keep, [self.labels[a] for a in axes], sums, counts, self.skipped)
+            wanted[axis] = self.labels[axis].index(label)
+
+        strides = [0] * len(self.shape)
+        step = 1
+        for a, size in zip(reversed(axes), reversed(shape)):
+            strides[a] = step
+            step *= size
+
+        for target, total, n in zip(self._targets(strides, wanted), self.sums, self.counts):
+            if n and target >= 0:
+                sums[target] += total
+                counts[target] += n
+        return Cube(keep, [self.labels[a] for a in axes], sums, counts, self.skipped)
+
+    def cells(self):
+        """
+        ((label per dim), sum, count) for every non-empty cell.
+        """
+        for labels, total, n in zip(product(*self.labels), self.sums, self.counts):
+            if n:
+                yield labels, total, n
+
+    def rollups(self):
+        """
+        (dims, cube) for every proper, non-empty subset of the dimensions:
+        the subtotals of a cross-tab, largest groupings first. Each one is
+        summed out of the smallest roll-up a dimension larger.
+        """
+        parents = [(self.dims, self)]
+        for size in range(len(self.dims) - 1, 0, -1):
+            level = []
+            for keep in combinations(self.dims, size):
+                parent = min((cube for dims, cube in parents if set(keep) <= set(dims)), key=len)
+                level.append((list(keep), parent.project(list(keep))))
+                yield level[-1]
+            parents = level
+
+    @property
+    def total_sum(self) -> int:
+        return sum(self.sums)
+
+    @property
+    def total_count(self) -> int:
+        return sum(self.counts)
@@ -0,0 +1,141 @@
+import cProfile
+import io
+import itertools
+import pstats
+import threading
+import time
+from collections import deque
+
+# -----------------------------------------------------------------------------
+# Per-request cProfile helpers + a small in-memory store of recent profiles
+# -----------------------------------------------------------------------------
+
+
+def start_profiler():
+    """
+    Start profiling the calling thread.
+    Returns None if another profiler is already active (e.g. nested request).
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+
+def profiled(fn):
+    """
+    fn wrapped to run under its own profiler (for work handed to another
+    thread): calling it returns (fn's result, the finished profiler or None).
+    """
+    def run(*args):
+        profiler = start_profiler()
+        try:
+            return fn(*args), profiler
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    return run
+
+
+def _stats(profiler: cProfile.Profile, extra=(), stream=None) -> pstats.Stats:
+    stats = pstats.Stats(profiler, stream=stream)
+    for other in extra:
+        stats.add(other)
+    return stats
+
+
+def top_functions(profiler: cProfile.Profile, limit: int = 20, sort: str = "cumulative",
+                  extra=()) -> list[dict]:
+    """
+    Summarise a finished profile (plus `extra` profiles of work it waited
+    on in other threads) as the `limit` most expensive functions.
+    """
+    stats = _stats(profiler, extra)
+    stats.sort_stats(sort)
+
+    result = []
+    for func in stats.fcn_list[:limit]:
+        prim_calls, total_calls, tottime, cumtime, _callers = stats.stats[func]
+        filename, line, name = func
+        result.append(
+            {
+                "function": name,
+                "file": filename,
+                "line": line,
+                "calls": total_calls,
+                "primitive_calls": prim_calls,
+                "total_time_ms": round(tottime * 1000, 3),
+                "cumulative_time_ms": round(cumtime * 1000, 3),
+            }
+        )
+    return result
+
+
+def stats_text(profiler: cProfile.Profile, limit: int = 40, sort: str = "cumulative", extra=()) -> str:
+    """
+    Classic pstats report (with callers) as plain text.
+    """
+    out = io.StringIO()
+    stats = _stats(profiler, extra, stream=out)
+    stats.sort_stats(sort).print_stats(limit)
+    stats.print_callers(limit)
+    return out.getvalue()
+
+
+def compact_summary(functions: list[dict], limit: int = 5) -> str:
+    """
+    One-line summary for log output: "name (file:line) 12.3ms; ..."
+    """
+    parts = []
+    for fn in functions[:limit]:
+        short_file = fn["file"].rsplit("/", 1)[-1]
+        parts.append(f'{fn["function"]} ({short_file}:{fn["line"]}) {fn["cumulative_time_ms"]}ms')
+    return "; ".join(parts)
+
+
+class ProfileStore:
+    """
+    Ring buffer of the most recent request profiles, addressable by id.
+    """
+
+    def __init__(self, capacity: int = 50):
+        self._items: deque[dict] = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, endpoint: str, path: str, duration_ms: float, reason: str,
+            profiler: cProfile.Profile, rows_scanned: int = 0, extra=()) -> dict:
+        entry = {
+            "id": next(self._ids),
+            "endpoint": endpoint,
+            "path": path,
+            "reason": reason,
+            "duration_ms": round(duration_ms, 3),
+            "rows_scanned": rows_scanned,
+            "recorded_at": time.time(),
+            "top_functions": top_functions(profiler, extra=extra),
+            "text": stats_text(profiler, extra=extra),
+        }
+        if extra:
+            # The request thread mostly waited on these: their own summary
+            entry["compute_top_functions"] = top_functions(extra[0], extra=extra[1:])
+        with self._lock:
+            self._items.append(entry)
+        return entry
+
+    def get(self, profile_id: int):
+        with self._lock:
+            for entry in self._items:
+                if entry["id"] == profile_id:
+                    return entry
+        return None
+
+    def recent(self) -> list[dict]:
+        with self._lock:
+            items = list(self._items)
+        return [
+            {k: v for k, v in entry.items() if k not in ("top_functions", "compute_top_functions", "text")}
+            for entry in reversed(items)
+        ]
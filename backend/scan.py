@@ -0,0 +1,417 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from multiprocessing import shared_memory
+
+from columnar import INT_TYPECODE, NULL, Bitmap, ColumnTable
+
+# -----------------------------------------------------------------------------
+# Parallel scan engine: grouped sum / count over ColumnTable int columns
+# -----------------------------------------------------------------------------
+# Columns are copied once into shared memory segments; worker processes each
+# scan one contiguous shard and return a partial aggregate that the caller
+# merges. With a single worker everything runs in-process on the same kernel.
+
+# Past this share of NULL rows, skipping them one by one costs more than
+# checking every row
+DENSE_MAX_EXCEPTIONS = 1 / 16
+
+# shm name -> (SharedMemory, int view). Filled by share(); forked workers
+# inherit it, anything else attaches by name on first use.
+_segments: dict[str, tuple] = {}
+
+
+def _column_view(ref):
+    if not isinstance(ref, str):
+        return ref
+    seg = _segments.get(ref)
+    if seg is None:
+        shm = shared_memory.SharedMemory(name=ref)
+        seg = (shm, shm.buf.cast(INT_TYPECODE))
+        _segments[ref] = seg
+    return seg[1]
+
+
+def _runs(lo: int, hi: int, exceptions):
+    """
+    [a, b) ranges of rows in [lo, hi) between the (sorted) exception rows.
+    """
+    start = lo
+    for i in exceptions:
+        if start < i:
+            yield start, i
+        start = i + 1
+    if start < hi:
+        yield start, hi
+
+
+def scan_range(keys, values, lo: int, hi: int, offset: int, n_keys: int, exceptions=None) -> tuple:
+    """
+    Grouped sum / count over rows [lo, hi).
+
+    keys:   int column used as a dense group index (key - offset), or None
+            for a single group.
+    values: int column to sum, or None to only count rows.
+    Rows whose key (or value) is NULL are not aggregated; they are counted
+    in `skipped` instead.
+    exceptions: when known, the sorted rows in [lo, hi) with a NULL key or
+            value (from the table's NULL bitmaps); the runs of rows between
+            them are then aggregated without any per-row check.
+    Returns (sums, counts, skipped).
+    """
+    if exceptions is not None:
+        return _scan_dense(keys, values, lo, hi, offset, n_keys, exceptions)
+
+    sums = [0] * n_keys
+    counts = [0] * n_keys
+    skipped = 0
+
+    if keys is None:
+        total = 0
+        n = 0
+        if values is None:
+            n = hi - lo
+        else:
+            for v in values[lo:hi]:
+                if v == NULL:
+                    skipped += 1
+                else:
+                    total += v
+                    n += 1
+        sums[0] = total
+        counts[0] = n
+    elif values is None:
+        for k in keys[lo:hi]:
+            if k == NULL:
+                skipped += 1
+            else:
+                counts[k - offset] += 1
+    else:
+        for k, v in zip(keys[lo:hi], values[lo:hi]):
+            if k == NULL or v == NULL:
+                skipped += 1
+            else:
+                i = k - offset
+                sums[i] += v
+                counts[i] += 1
+
+    return sums, counts, skipped
+
+
+def _scan_dense(keys, values, lo: int, hi: int, offset: int, n_keys: int, exceptions) -> tuple:
+    sums = [0] * n_keys
+    counts = [0] * n_keys
+    if keys is None:
+        # Whole-range C loops, then take the exception rows back out
+        counts[0] = hi - lo - len(exceptions)
+        if values is not None:
+            sums[0] = sum(values[lo:hi]) - sum(values[i] for i in exceptions)
+    elif values is None:
+        tally = Counter(keys[lo:hi])
+        for i in exceptions:
+            tally[keys[i]] -= 1
+        for k, n in tally.items():
+            if n:
+                counts[k - offset] += n
+    else:
+        for a, b in _runs(lo, hi, exceptions):
+            for k, v in zip(keys[a:b], values[a:b]):
+                i = k - offset
+                sums[i] += v
+                counts[i] += 1
+    return sums, counts, len(exceptions)
+
+
+def scan_cube_range(key_cols, offsets, strides, values, lo: int, hi: int, size: int,
+                    null_slots=None, dense=None, exceptions=None) -> tuple:
+    """
+    Grouped sum / count over rows [lo, hi) keyed by several int columns:
+    a row's group is the flat index sum((key_i - offset_i) * stride_i).
+    Rows with a NULL in any key (or in the value) are skipped, except for
+    keys with a null slot (null_slots[i] not None): there NULL counts as
+    that coordinate. Key columns flagged in `dense` are not checked for
+    NULL: they hold none, or their NULL rows are among `exceptions` (the
+    sorted rows with a NULL value or a NULL key that has no null slot, see
+    scan_range). Returns (sums, counts, skipped).
+    """
+    null_slots = null_slots or [None] * len(key_cols)
+    dense = dense or [False] * len(key_cols)
+    index = None
+    index_dense = True  # index holds no NULL (outside exception rows)
+    for col, offset, stride, null_slot, no_nulls in zip(key_cols, offsets, strides, null_slots, dense):
+        part = col[lo:hi]
+        if no_nulls and index_dense:
+            coords = [(k - offset) * stride for k in part]
+            index = coords if index is None else [i + c for i, c in zip(index, coords)]
+            continue
+        if null_slot is not None:
+            null_index = null_slot * stride
+            coords = [null_index if k == NULL else (k - offset) * stride for k in part]
+            index = coords if index is None else [
+                NULL if i == NULL else i + c for i, c in zip(index, coords)
+            ]
+        elif index is None:
+            index = [NULL if k == NULL else (k - offset) * stride for k in part]
+        else:
+            index = [
+                NULL if i == NULL or k == NULL else i + (k - offset) * stride
+                for i, k in zip(index, part)
+            ]
+        index_dense = index_dense and null_slot is not None
+    part_values = values[lo:hi] if values is not None else None
+    if exceptions is not None:
+        exceptions = [i - lo for i in exceptions]
+    return scan_range(index, part_values, 0, hi - lo, 0, size, exceptions)
+
+
+def _scan_task(task: tuple) -> tuple:
+    key_ref, value_ref, lo, hi, offset, n_keys, exceptions = task
+    return scan_range(_column_view(key_ref), _column_view(value_ref), lo, hi, offset, n_keys, exceptions)
+
+
+def _scan_cube_task(task: tuple) -> tuple:
+    key_refs, offsets, strides, value_ref, lo, hi, size, null_slots, dense, exceptions = task
+    keys = [_column_view(ref) for ref in key_refs]
+    return scan_cube_range(keys, offsets, strides, _column_view(value_ref), lo, hi, size,
+                           null_slots, dense, exceptions)
+
+
+def _null_rows(table: ColumnTable, fields) -> Bitmap | None:
+    """
+    Rows with a NULL in any of the fields (None entries ignored), from the
+    table's NULL bitmaps. None if a field's NULLs were never indexed or
+    are too many for the scan to skip them one by one.
+    """
+    rows = Bitmap(len(table))
+    for field in fields:
+        if field is None:
+            continue
+        nulls = table.null_rows.get(field)
+        if nulls is None:
+            return None
+        if nulls:
+            rows = rows | nulls
+    if rows and len(rows) > len(table) * DENSE_MAX_EXCEPTIONS:
+        return None
+    return rows
+
+
+def _shard_rows(rows: Bitmap | None, lo: int, hi: int):
+    return rows.rows(lo, hi) if rows is not None else None
+
+
+class GroupedAggregate:
+    """
+    Sum and count per dense key, plus rows skipped because of NULLs.
+    """
+
+    def __init__(self, offset: int, sums: list, counts: list, skipped: int = 0):
+        self.offset = offset
+        self.sums = sums
+        self.counts = counts
+        self.skipped = skipped
+
+    def merge(self, sums: list, counts: list, skipped: int) -> None:
+        self.sums = [a + b for a, b in zip(self.sums, sums)]
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.skipped += skipped
+
+    def items(self):
+        """
+        (key, sum, count) for every key that occurred at least once.
+        """
+        for i, n in enumerate(self.counts):
+            if n:
+                yield self.offset + i, self.sums[i], n
+
+    @property
+    def total_sum(self) -> int:
+        return sum(self.sums)
+
+    @property
+    def total_count(self) -> int:
+        return sum(self.counts)
+
+
+class ScanEngine:
+    def __init__(self, workers: int = 1, min_shard_rows: int = 50_000):
+        if "fork" not in multiprocessing.get_all_start_methods():
+            workers = 1
+        self.workers = max(1, workers)
+        self.min_shard_rows = max(1, min_shard_rows)
+
+        self._shared: dict[tuple, str] = {}  # (table, field) -> shm name
+        self._owned: list = []               # (creator pid, segment, view)
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    @property
+    def parallel(self) -> bool:
+        return self.workers > 1
+
+    # -- shared memory --------------------------------------------------------
+    def share(self, table: ColumnTable, field: str) -> str:
+        """
+        Move an int column into shared memory; the table keeps a view of it.
+        """
+        with self._lock:
+            name = self._shared.get((table.name, field))
+            if name is not None:
+                return name
+
+            col = table.columns[field]
+            nbytes = max(memoryview(col).itemsize, memoryview(col).nbytes)
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            view = shm.buf.cast(INT_TYPECODE)[:len(col)]
+            view[:] = memoryview(col)
+
+            table.columns[field] = view
+            _segments[shm.name] = (shm, view)
+            self._owned.append((os.getpid(), shm, view))
+            self._shared[(table.name, field)] = shm.name
+            return shm.name
+
+    def publish(self, table: ColumnTable) -> None:
+        """
+        Share every int column of a table up front (no-op when serial).
+        """
+        if not self.parallel:
+            return
+        for field in table.int_fields:
+            self.share(table, field)
+
+    # -- scanning -------------------------------------------------------------
+    def group_sum_count(self, table: ColumnTable, key=None, value=None) -> GroupedAggregate:
+        """
+        Sum of `value` and row count per distinct `key` (dense over the key's
+        min..max range). key=None aggregates the whole table as one group;
+        value=None counts rows only.
+        """
+        if key is None:
+            offset, n_keys = 0, 1
+        else:
+            key_range = table.column_range(key)
+            if key_range is None:
+                return GroupedAggregate(0, [], [], skipped=len(table))
+            offset, n_keys = key_range[0], key_range[1] - key_range[0] + 1
+
+        n = len(table)
+        shards = self._shards(n)
+        result = GroupedAggregate(offset, [0] * n_keys, [0] * n_keys)
+        nulls = _null_rows(table, [key, value])
+
+        if len(shards) <= 1:
+            keys = table.columns[key] if key is not None else None
+            values = table.columns[value] if value is not None else None
+            result.merge(*scan_range(keys, values, 0, n, offset, n_keys, _shard_rows(nulls, 0, n)))
+            return result
+
+        key_ref = self.share(table, key) if key is not None else None
+        value_ref = self.share(table, value) if value is not None else None
+        tasks = [
+            (key_ref, value_ref, lo, hi, offset, n_keys, _shard_rows(nulls, lo, hi))
+            for lo, hi in shards
+        ]
+        for partial in self._get_pool().imap_unordered(_scan_task, tasks):
+            result.merge(*partial)
+        return result
+
+    def cube_sum_count(self, table: ColumnTable, keys: list[str], value=None, nullable=()) -> tuple:
+        """
+        Sum of `value` and row count per combination of several keys, as
+        one dense row-major array over each key's min..max range. Keys in
+        `nullable` get one extra, last coordinate for NULL instead of
+        skipping those rows.
+        Returns (offsets, shape, GroupedAggregate over flat cell indexes).
+        """
+        ranges = [table.column_range(key) for key in keys]
+        if any(r is None and key not in nullable for key, r in zip(keys, ranges)):
+            return [0] * len(keys), [0] * len(keys), GroupedAggregate(0, [], [], skipped=len(table))
+
+        offsets = [r[0] if r is not None else 0 for r in ranges]
+        shape = [r[1] - r[0] + 1 if r is not None else 0 for r in ranges]
+        null_slots = [None] * len(keys)
+        for i, key in enumerate(keys):
+            if key in nullable:
+                null_slots[i] = shape[i]
+                shape[i] += 1
+        strides = [1] * len(keys)
+        for i in range(len(keys) - 2, -1, -1):
+            strides[i] = strides[i + 1] * shape[i + 1]
+        size = strides[0] * shape[0] if keys else 1
+
+        def no_nulls(key):
+            return key in table.null_rows and not table.null_rows[key]
+
+        nulls = _null_rows(table, [key for key in keys if key not in nullable] + [value])
+        if nulls is not None:
+            # Rows with a NULL key or value are skipped as exceptions; only
+            # keys with a null slot still check their NULLs
+            dense = [key not in nullable or no_nulls(key) for key in keys]
+        else:
+            dense = [no_nulls(key) for key in keys]
+
+        n = len(table)
+        shards = self._shards(n)
+        result = GroupedAggregate(0, [0] * size, [0] * size)
+
+        if len(shards) <= 1:
+            key_cols = [table.columns[key] for key in keys]
+            values = table.columns[value] if value is not None else None
+            result.merge(*scan_cube_range(key_cols, offsets, strides, values, 0, n, size, null_slots,
+                                          dense, _shard_rows(nulls, 0, n)))
+            return offsets, shape, result
+
+        key_refs = [self.share(table, key) for key in keys]
+        value_ref = self.share(table, value) if value is not None else None
+        tasks = [
+            (key_refs, offsets, strides, value_ref, lo, hi, size, null_slots, dense, _shard_rows(nulls, lo, hi))
+            for lo, hi in shards
+        ]
+        for partial in self._get_pool().imap_unordered(_scan_cube_task, tasks):
+            result.merge(*partial)
+        return offsets, shape, result
+
+    def _shards(self, n: int) -> list[tuple[int, int]]:
+        """
+        Contiguous [lo, hi) row ranges, one per scan worker (at least
+        min_shard_rows each).
+        """
+        shards = min(self.workers, max(1, n // self.min_shard_rows))
+        step = max(1, -(-n // shards))
+        return [(lo, min(lo + step, n)) for lo in range(0, n, step)]
+
+    def _get_pool(self):
+        with self._lock:
+            # A pool is only usable from the process that created it
+            # (e.g. not from workers forked by serve.py)
+            if self._pool is None or self._pool_pid != os.getpid():
+                ctx = multiprocessing.get_context("fork")
+                self._pool = ctx.Pool(self.workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None and self._pool_pid == os.getpid():
+            self._pool.terminate()
+            self._pool = None
+        # Only the process that created a segment removes it
+        pid = os.getpid()
+        for owner, shm, view in self._owned:
+            if owner != pid:
+                continue
+            _segments.pop(shm.name, None)
+            view.release()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+            try:
+                shm.close()
+            except BufferError:
+                pass
+        self._owned = [entry for entry in self._owned if entry[0] != pid]
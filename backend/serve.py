@@ -0,0 +1,151 @@
+"""
+Production launcher for the API.
+
+Loads every table once in a master process, freezes the loaded objects
+out of the garbage collector's reach and then forks N worker processes
+that serve requests from a shared listening socket. Workers share the
+loaded tables with the master copy-on-write, so adding workers adds
+throughput without multiplying RAM.
+
+    python backend/serve.py --workers 4 --port 5000
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+from werkzeug.serving import make_server
+
+# Respawn throttling: a worker dying this soon after start counts as a crash loop
+MIN_WORKER_UPTIME = 1.0
+RESPAWN_BACKOFF = 1.0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Preforking WSGI server for the school API")
+    parser.add_argument("--host", default=os.environ.get("API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("API_PORT", 5000)))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("API_WORKERS", os.cpu_count() or 1)),
+        help="number of worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--no-threads",
+        dest="threaded",
+        action="store_false",
+        help="serve one request at a time per worker",
+    )
+    parser.add_argument("--backlog", type=int, default=1024)
+    return parser.parse_args(argv)
+
+
+def freeze_heap() -> None:
+    """
+    Move everything allocated so far into the GC's permanent generation.
+    Collections in the workers then never touch (and never unshare) the
+    pages holding the loaded tables.
+    """
+    gc.collect()
+    gc.freeze()
+    print(f"[SERVE] Froze {gc.get_freeze_count():,} objects out of GC tracking")
+
+
+def run_worker(index: int, listener: socket.socket, wsgi_app, threaded: bool) -> None:
+    """
+    Serve requests forever from the inherited listening socket.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, wsgi_app, threaded=threaded, fd=listener.fileno())
+    print(f"[SERVE] Worker {index} (pid {os.getpid()}) ready")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def spawn_worker(index: int, listener: socket.socket, wsgi_app, threaded: bool) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(index, listener, wsgi_app, threaded)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    workers = max(1, args.workers)
+
+    # Workers already provide one process per core; unless asked otherwise,
+    # don't also give each of them a pool of scan processes
+    os.environ.setdefault("API_SCAN_WORKERS", "1")
+
+    # Importing the app loads every table - once, here in the master
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as api
+
+    # Tables load in a background thread; fork only once they are all in
+    api.wait_until_loaded()
+    freeze_heap()
+
+    listener = socket.create_server((args.host, args.port), backlog=args.backlog)
+    listener.set_inheritable(True)
+    print(f"[SERVE] Listening on http://{args.host}:{args.port} with {workers} workers")
+
+    children: dict[int, tuple[int, float]] = {}  # pid -> (worker index, start time)
+    for i in range(workers):
+        pid = spawn_worker(i, listener, api.app, args.threaded)
+        children[pid] = (i, time.monotonic())
+
+    stopping = False
+
+    def _stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+
+        index, started = children.pop(pid, (None, 0.0))
+        if stopping or index is None:
+            continue
+
+        print(f"[SERVE] Worker {index} (pid {pid}) exited with status {status}; respawning")
+        if time.monotonic() - started < MIN_WORKER_UPTIME:
+            time.sleep(RESPAWN_BACKOFF)
+        new_pid = spawn_worker(index, listener, api.app, args.threaded)
+        children[new_pid] = (index, time.monotonic())
+
+    listener.close()
+    print("[SERVE] Stopped")
+
+
+if __name__ == "__main__":
+    main()
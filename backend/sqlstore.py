@@ -0,0 +1,600 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from columnar import (
+    CATEGORY, DATE, INT, NULL, PACKED_KINDS, format_date, original_value, parse_date, parse_int,
+)
+
+# -----------------------------------------------------------------------------
+# Disk-backed storage: the clean-zone CSVs bulk-loaded into one SQLite file
+# -----------------------------------------------------------------------------
+# Each CSV is imported once; later starts reuse the database (and the tables'
+# validation reports) as long as the source file (size + mtime) and its
+# declared schema are unchanged.
+# Aggregations run as SQL so the big tables never have to fit in RAM.
+
+INSERT_BATCH = 50_000
+# Part of every import's signature: bump when what an import writes changes
+IMPORT_FORMAT = 2
+
+# SQL counterparts of the fact table's derived join columns (see
+# derive_fact_join_columns in app.py): fact key column, dimension table and
+# its key, and label expression(s) where {t} is the joined dimension row and
+# {k} the fact key. They are evaluated over `agg`, the fact table already
+# aggregated per key, so each join only touches one row per distinct key.
+# A NULL label means the row is skipped, as with a NULL derived code.
+# Columns that are only dictionary-encoded in memory have no dimension.
+FACT_DIMENSIONS: dict[str, tuple[str, str | None, str | None, tuple[str, ...]]] = {
+    "gender_code": (
+        "student_key", "dim_students", "student_key",
+        ("COALESCE({t}.gender, CASE WHEN {k} IS NOT NULL THEN 'Unknown' END)",),
+    ),
+    "nationality_code": (
+        "student_key", "dim_students", "student_key",
+        ("COALESCE({t}.nationality, CASE WHEN {k} IS NOT NULL THEN 'Unknown' END)",),
+    ),
+    "grade_level_code": (
+        "student_key", "dim_students", "student_key",
+        ("{t}.grade_level",),
+    ),
+    "class_code": (
+        "class_key", "dim_classes", "class_key",
+        ("COALESCE(NULLIF({t}.class_name, ''), 'Class ' || {k})",),
+    ),
+    "semester_code": (
+        "semester_key", "dim_semesters", "semester_key",
+        ("COALESCE(NULLIF({t}.semester_name, ''), 'Semester ' || {k})",),
+    ),
+    "date_code": (
+        "date_key", "dim_date", "date_key",
+        ("NULLIF({t}.date_value, '')",),
+    ),
+    "year_month_code": (
+        "date_key", "dim_date", "date_key",
+        ("{t}.year", "{t}.month"),
+    ),
+    "weekday_code": (
+        "date_key", "dim_date", "date_key",
+        ("COALESCE(NULLIF({t}.day_of_week, ''), CASE WHEN {k} IS NOT NULL THEN 'Unknown' END)",),
+    ),
+    "grade_code": ("grade", None, None, ("{k}",)),
+}
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _index_name(table: str, columns) -> str:
+    return f"ix_{table}_{'_'.join(columns)}"
+
+
+def _converter(kind: str):
+    """
+    CSV text -> SQLite value, with the same NULL rules as ColumnTable.
+    """
+    if kind == INT:
+        return lambda val: None if (n := parse_int(val)) == NULL else n
+    if kind == DATE:
+        return lambda val: format_date(parse_date(val))
+    if kind == CATEGORY:
+        return lambda val: val or None
+    return lambda val: val
+
+
+def _original(kind: str, val):
+    """
+    original_value for the _originals overlay; SQLite integers stop at
+    64 bits, so larger ones are kept as text.
+    """
+    original = original_value(kind, val)
+    if isinstance(original, int) and not -2 ** 63 <= original < 2 ** 63:
+        return val
+    return original
+
+
+def _contains_ci(haystack, needle) -> int:
+    # Python's lower() (unlike SQLite's) folds non-ASCII letters too
+    return int(haystack is not None and needle in haystack.lower())
+
+
+class SqlTable:
+    """
+    Read-only stand-in for an in-memory table that lives in SQLite:
+    len(), truthiness and row access / slicing (row dicts) like the
+    in-memory tables. Rows keep CSV order (rowid = row index + 1).
+    """
+
+    def __init__(self, store: "SqlStore", name: str, fields: list[str], rows: int):
+        self.store = store
+        self.name = name
+        self.fields = list(fields)
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            window = range(self._rows)[idx]
+            if window.step != 1:
+                return [self[i] for i in window]
+            return self.store.fetch_rows(self.name, self.fields, window.start, len(window))
+        if idx < 0:
+            idx += self._rows
+        if not 0 <= idx < self._rows:
+            raise IndexError("row index out of range")
+        return self.store.fetch_rows(self.name, self.fields, idx, 1)[0]
+
+
+class SqlStore:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._columns: dict[str, list[str]] = {}
+        self._kinds: dict[str, dict[str, str]] = {}
+
+    # -- connections ----------------------------------------------------------
+    def connect(self) -> sqlite3.Connection:
+        """
+        This thread's connection (one per thread, reopened after a fork).
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.create_function("contains_ci", 2, _contains_ci, deterministic=True)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # -- bulk load ------------------------------------------------------------
+    def import_csv(self, name: str, path: Path, columns: dict[str, str],
+                   indexes=(), progress=None) -> int:
+        """
+        Make table `name` hold the CSV's rows (schema columns only) and
+        return its row count. Skipped if the database already has this
+        exact file + schema. progress(rows, fraction) is called while
+        importing.
+        """
+        conn = self.connect()
+        stat = path.stat()
+        signature = f"{IMPORT_FORMAT}:{stat.st_size}:{stat.st_mtime_ns}:" + ",".join(
+            f"{col}={kind}" for col, kind in columns.items()
+        ) + ":" + ";".join(",".join(ix) for ix in indexes)
+
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS _sources "
+            "(name TEXT PRIMARY KEY, signature TEXT NOT NULL, row_count INTEGER NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS _reports "
+            "(name TEXT PRIMARY KEY, signature TEXT NOT NULL, report TEXT NOT NULL)"
+        )
+        # CSV values of cells imported as NULL that rows still show (see
+        # original_value in columnar.py); row is the table's rowid
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS _originals (name TEXT NOT NULL, row INTEGER NOT NULL, "
+            "col TEXT NOT NULL, value, PRIMARY KEY (name, row, col)) WITHOUT ROWID"
+        )
+        found = conn.execute(
+            "SELECT signature, row_count FROM _sources WHERE name = ?", (name,)
+        ).fetchone()
+        self._columns[name] = list(columns)
+        self._kinds[name] = dict(columns)
+        if found is not None and found[0] == signature:
+            return found[1]
+
+        table = _quote(name)
+        fields = list(columns)
+        converters = [_converter(kind) for kind in columns.values()]
+        packed = [(i, kind) for i, kind in enumerate(columns.values()) if kind in PACKED_KINDS]
+        col_defs = ", ".join(
+            f"{_quote(col)} {'INTEGER' if kind == INT else 'TEXT'}"
+            for col, kind in columns.items()
+        )
+        insert = (
+            f"INSERT INTO {table} ({', '.join(map(_quote, fields))}) "
+            f"VALUES ({', '.join('?' * len(fields))})"
+        )
+        total_bytes = max(1, stat.st_size)
+        rows = 0
+
+        with conn:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute(f"CREATE TABLE {table} ({col_defs})")
+            conn.execute("DELETE FROM _originals WHERE name = ?", (name,))
+            keep = "INSERT INTO _originals (name, row, col, value) VALUES (?, ?, ?, ?)"
+
+            with path.open("r", newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                positions = [header.index(col) if col in header else None for col in fields]
+
+                batch = []
+                originals = []
+                for record in reader:
+                    n = len(record)
+                    raw = [record[pos] if pos is not None and pos < n else None for pos in positions]
+                    values = tuple([convert(val) for convert, val in zip(converters, raw)])
+                    if None in values:
+                        rowid = rows + len(batch) + 1
+                        for i, kind in packed:
+                            if values[i] is None and raw[i] is not None:
+                                original = _original(kind, raw[i])
+                                if original is not None:
+                                    originals.append((name, rowid, fields[i], original))
+                    batch.append(values)
+                    if len(batch) == INSERT_BATCH:
+                        conn.executemany(insert, batch)
+                        conn.executemany(keep, originals)
+                        rows += len(batch)
+                        batch.clear()
+                        originals.clear()
+                        if progress is not None:
+                            progress(rows, f.buffer.tell() / total_bytes)
+                conn.executemany(insert, batch)
+                conn.executemany(keep, originals)
+                rows += len(batch)
+
+            for ix in indexes:
+                ix_name = _quote(_index_name(name, ix))
+                conn.execute(f"CREATE INDEX {ix_name} ON {table} ({', '.join(map(_quote, ix))})")
+
+            conn.execute(
+                "INSERT OR REPLACE INTO _sources (name, signature, row_count) VALUES (?, ?, ?)",
+                (name, signature, rows),
+            )
+
+        conn.execute(f"ANALYZE {table}")
+        return rows
+
+    def table(self, name: str, rows: int) -> SqlTable:
+        return SqlTable(self, name, self._columns[name], rows)
+
+    def _rows(self, name: str, fields: list[str], cur) -> list[dict]:
+        """
+        Row dicts from (rowid, *fields) results, with the original CSV values
+        of cells imported as NULL put back.
+        """
+        by_rowid = {rowid: dict(zip(fields, values)) for rowid, *values in cur}
+        rowids = list(by_rowid)
+        conn = self.connect()
+        for start in range(0, len(rowids), 500):
+            chunk = rowids[start:start + 500]
+            kept = conn.execute(
+                f"SELECT row, col, value FROM _originals WHERE name = ? "
+                f"AND row IN ({', '.join('?' * len(chunk))})",
+                [name, *chunk],
+            )
+            for rowid, col, value in kept:
+                if col in by_rowid[rowid]:
+                    if isinstance(value, str) and self._kinds[name][col] == INT:
+                        value = int(value)
+                    by_rowid[rowid][col] = value
+        return list(by_rowid.values())
+
+    def fetch_rows(self, name: str, fields: list[str], offset: int, limit: int) -> list[dict]:
+        if limit <= 0:
+            return []
+        cur = self.connect().execute(
+            f"SELECT rowid, {', '.join(map(_quote, fields))} FROM {_quote(name)} "
+            "WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (offset, limit),
+        )
+        return self._rows(name, fields, cur)
+
+    # -- aggregations ---------------------------------------------------------
+    def fact_cube(self, keys: list[str], value=None, nullable=()) -> tuple[list, int]:
+        """
+        SQL version of grouping fact_attendance by several derived join
+        columns (FACT_DIMENSIONS) or raw fact columns at once:
+        ([((label per key), sum, count)] in label order, rows skipped
+        because a label or the value is NULL). A key with several label
+        expressions (year_month_code) has a tuple label. Keys in `nullable`
+        keep NULL as a group of its own (label None) instead of skipping
+        it. No keys aggregates everything as one group.
+        """
+        fact_columns = self._columns["fact_attendance"]
+        if value is not None and value not in fact_columns:
+            raise KeyError(value)
+        total_expr = f"SUM({_quote(value)})" if value else "0"
+        count_expr = f"COUNT({_quote(value)})" if value else "COUNT(*)"
+
+        sources: list[str] = []  # fact columns grouped in the subquery
+        joins: dict = {}         # (dim table, dim key, source) -> alias
+        label_exprs: list[str] = []
+        widths: list[int] = []
+        for key in keys:
+            if key in FACT_DIMENSIONS:
+                source, dim, dim_key, templates = FACT_DIMENSIONS[key]
+            elif key in fact_columns:
+                source, dim, dim_key, templates = key, None, None, ("{k}",)
+            else:
+                raise KeyError(key)
+            if source not in sources:
+                sources.append(source)
+            k = f"agg.k{sources.index(source)}"
+            t = joins.setdefault((dim, dim_key, source), f"j{len(joins)}") if dim else None
+            label_exprs += [template.format(t=t, k=k) for template in templates]
+            widths.append(len(templates))
+
+        conn = self.connect()
+        if not keys:
+            total, n, rows = conn.execute(
+                f"SELECT {total_expr}, {count_expr}, COUNT(*) FROM fact_attendance"
+            ).fetchone()
+            return ([((), total or 0, n)] if n else []), rows - n
+
+        group_cols = ", ".join(f"{_quote(src)} AS k{i}" for i, src in enumerate(sources))
+        join_sql = " ".join(
+            f"LEFT JOIN {_quote(dim)} {alias} ON {alias}.{_quote(dim_key)} = agg.k{sources.index(source)}"
+            for (dim, dim_key, source), alias in joins.items()
+        )
+        label_list = ", ".join(label_exprs)
+        cur = conn.execute(
+            f"SELECT {label_list}, SUM(agg.total), SUM(agg.n), SUM(agg.rows) FROM ("
+            f"  SELECT {group_cols}, {total_expr} AS total, {count_expr} AS n, COUNT(*) AS rows"
+            f"  FROM fact_attendance GROUP BY {', '.join(f'k{i}' for i in range(len(sources)))}"
+            f") agg {join_sql} "
+            f"GROUP BY {label_list} ORDER BY {label_list}"
+        )
+
+        groups = []
+        skipped = 0
+        width = len(label_exprs)
+        for record in cur:
+            parts = record[:width]
+            total, n, rows = record[width:]
+            labels = []
+            pos = 0
+            for w in widths:
+                label = parts[pos] if w == 1 else tuple(parts[pos:pos + w])
+                labels.append(None if w > 1 and None in label else label)
+                pos += w
+            if any(label is None and key not in nullable for key, label in zip(keys, labels)):
+                skipped += rows
+                continue
+            skipped += rows - n
+            if n:
+                groups.append((tuple(labels), total or 0, n))
+        return groups, skipped
+
+    def fact_groups(self, key=None, value=None) -> tuple[list, int]:
+        """
+        fact_cube() over a single key (None = one group, label None):
+        ([(label, sum, count)], skipped).
+        """
+        groups, skipped = self.fact_cube([key] if key is not None else [], value)
+        return [(labels[0] if labels else None, total, n) for labels, total, n in groups], skipped
+
+    def student_counts(self, field: str) -> list[tuple]:
+        """
+        Rows per distinct dim_students value (None for NULL), in order of
+        first appearance.
+        """
+        if field not in self._columns["dim_students"]:
+            raise KeyError(field)
+        col = _quote(field)
+        cur = self.connect().execute(
+            f"SELECT {col}, COUNT(*) FROM dim_students GROUP BY {col} ORDER BY MIN(rowid)"
+        )
+        return cur.fetchall()
+
+    # -- class drill-down -----------------------------------------------------
+    def class_roster(self, class_id: int, start: int, stop: int) -> tuple[int, list[dict]]:
+        """
+        (students in the class, rows [start:stop) of them in table order),
+        via the class_id index.
+        """
+        conn = self.connect()
+        total = conn.execute("SELECT COUNT(*) FROM dim_students WHERE class_id = ?", (class_id,)).fetchone()[0]
+        window = range(total)[start:stop]
+        if not window:
+            return total, []
+        fields = self._columns["dim_students"]
+        cur = conn.execute(
+            f"SELECT rowid, {', '.join(map(_quote, fields))} FROM dim_students WHERE class_id = ? "
+            "ORDER BY rowid LIMIT ? OFFSET ?",
+            (class_id, len(window), window.start),
+        )
+        return total, self._rows("dim_students", fields, cur)
+
+    def class_facts(self, class_keys: list[int]) -> tuple[list, list]:
+        """
+        Fact rows of the given class keys, via the (class_key, ...) indexes:
+        ([(grade or None, rows)], [(date_value, grade sum, graded rows, rows)]).
+        Rows whose date is NULL or has no dim_date row are left out of the
+        per-date totals.
+        """
+        if not class_keys:
+            return [], []
+        keys = ", ".join("?" * len(class_keys))
+        conn = self.connect()
+        grades = conn.execute(
+            f"SELECT grade, COUNT(*) FROM fact_attendance WHERE class_key IN ({keys}) GROUP BY grade",
+            class_keys,
+        ).fetchall()
+        per_date = conn.execute(
+            "SELECT NULLIF(d.date_value, ''), agg.total, agg.graded, agg.n FROM ("
+            "  SELECT date_key, SUM(grade) AS total, COUNT(grade) AS graded, COUNT(*) AS n FROM fact_attendance"
+            f"  WHERE class_key IN ({keys}) GROUP BY date_key"
+            ") AS agg JOIN dim_date d ON d.date_key = agg.date_key",
+            class_keys,
+        ).fetchall()
+        return grades, [(day, total or 0, graded, n) for day, total, graded, n in per_date if day is not None]
+
+    # -- data quality ---------------------------------------------------------
+    def out_of_range(self, name: str) -> dict[str, int]:
+        """
+        Per INT column, values imported as NULL because they do not fit int32
+        (the only INT values _originals keeps).
+        """
+        ints = [col for col, kind in self._kinds[name].items() if kind == INT]
+        counts = self.connect().execute(
+            f"SELECT col, COUNT(*) FROM _originals WHERE name = ? "
+            f"AND col IN ({', '.join('?' * len(ints))}) GROUP BY col",
+            [name, *ints],
+        )
+        return dict(counts.fetchall())
+
+    def null_counts(self, name: str) -> dict[str, int]:
+        """
+        Rows with a missing (NULL or empty) value, per column.
+        """
+        fields = self._columns[name]
+        sums = ", ".join(f"SUM({_quote(f)} IS NULL OR {_quote(f)} = '')" for f in fields)
+        row = self.connect().execute(f"SELECT {sums} FROM {_quote(name)}").fetchone()
+        return {field: n or 0 for field, n in zip(fields, row)}
+
+    def _orphan_condition(self, name: str, column: str, ref_table: str, ref_column: str) -> str:
+        col = f"{_quote(name)}.{_quote(column)}"
+        return (
+            f"{col} IS NOT NULL AND NOT EXISTS ("
+            f"SELECT 1 FROM {_quote(ref_table)} ref WHERE ref.{_quote(ref_column)} = {col})"
+        )
+
+    def orphan_keys(self, name: str, column: str, ref_table: str, ref_column: str,
+                    sample: int) -> tuple[int, list]:
+        """
+        (rows whose `column` is set but has no ref_table.ref_column match,
+        the first `sample` distinct such keys).
+        """
+        orphan = self._orphan_condition(name, column, ref_table, ref_column)
+        conn = self.connect()
+        rows = conn.execute(f"SELECT COUNT(*) FROM {_quote(name)} WHERE {orphan}").fetchone()[0]
+        keys = conn.execute(
+            f"SELECT DISTINCT {_quote(column)} FROM {_quote(name)} WHERE {orphan} "
+            f"ORDER BY {_quote(column)} LIMIT ?",
+            (sample,),
+        ).fetchall()
+        return rows, [key for (key,) in keys]
+
+    def exception_rows(self, name: str, foreign_keys: dict) -> int:
+        """
+        Rows with a NULL or orphan value in any of the foreign keys
+        (column -> (ref_table, ref_column)).
+        """
+        if not foreign_keys:
+            return 0
+        bad = " OR ".join(
+            f"{_quote(column)} IS NULL OR ({self._orphan_condition(name, column, *ref)})"
+            for column, ref in foreign_keys.items()
+        )
+        return self.connect().execute(f"SELECT COUNT(*) FROM {_quote(name)} WHERE {bad}").fetchone()[0]
+
+    def _sources_signature(self, names: list[str]) -> str:
+        sources = dict(self.connect().execute("SELECT name, signature FROM _sources").fetchall())
+        return "|".join(f"{name}={sources.get(name, '')}" for name in names)
+
+    def saved_report(self, name: str, sources: list[str]) -> dict | None:
+        """
+        The validation report saved for table `name`, if none of the
+        `sources` tables it was computed from has been re-imported since.
+        """
+        found = self.connect().execute(
+            "SELECT signature, report FROM _reports WHERE name = ?", (name,)
+        ).fetchone()
+        if found is None or found[0] != self._sources_signature(sources):
+            return None
+        return json.loads(found[1])
+
+    def save_report(self, name: str, sources: list[str], report: dict) -> None:
+        conn = self.connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO _reports (name, signature, report) VALUES (?, ?, ?)",
+                (name, self._sources_signature(sources), json.dumps(report)),
+            )
+
+    def name_pairs(self) -> list[tuple]:
+        """
+        (first_name, last_name, students) per distinct name pair.
+        """
+        return self.connect().execute(
+            "SELECT first_name, last_name, COUNT(*) FROM dim_students GROUP BY first_name, last_name"
+        ).fetchall()
+
+    def students_named(self, first_names: list[str], last_names: list[str],
+                       both: bool, limit: int) -> list[dict]:
+        """
+        First `limit` dim_students rows (in table order) whose first name is
+        one of first_names and/or (both) whose last name is one of last_names.
+        Reads the first_name / last_name indexes, never the whole table.
+        """
+        clauses = []
+        params: list = []
+        for field, names in (("first_name", first_names), ("last_name", last_names)):
+            if names:
+                clauses.append((field, f"{_quote(field)} IN ({', '.join('?' * len(names))})", names))
+            elif both:
+                return []
+        if not clauses:
+            return []
+
+        if both:
+            # The planner picks one name index and filters on the other
+            where = " AND ".join(condition for _, condition, _ in clauses)
+            params = [name for _, _, names in clauses for name in names]
+        else:
+            # For OR it would rather walk the table in rowid order (a full
+            # scan when the names are rare): take the first `limit` rowids
+            # from each name index instead and merge them
+            firsts = []
+            for field, condition, names in clauses:
+                index = _quote(_index_name("dim_students", (field,)))
+                firsts.append(
+                    f"SELECT rowid FROM (SELECT rowid FROM dim_students INDEXED BY {index} "
+                    f"WHERE {condition} ORDER BY rowid LIMIT ?)"
+                )
+                params += [*names, limit]
+            where = f"rowid IN ({' UNION ALL '.join(firsts)})"
+
+        fields = self._columns["dim_students"]
+        cur = self.connect().execute(
+            f"SELECT rowid, {', '.join(map(_quote, fields))} FROM dim_students "
+            f"WHERE {where} ORDER BY rowid LIMIT ?",
+            params + [limit],
+        )
+        return self._rows("dim_students", fields, cur)
+
+    def students_page(self, search, gender, nationality, grade_level,
+                      start: int, stop: int) -> tuple[int, list[dict]]:
+        """
+        Filtered dim_students (same rules as /students/list in memory):
+        (matching rows, rows [start:stop] of the matches as dicts).
+        """
+        where = []
+        params = []
+        if search:
+            where.append("(contains_ci(first_name, ?) OR contains_ci(last_name, ?))")
+            params += [search.lower(), search.lower()]
+        for field, wanted in (("gender", gender), ("nationality", nationality)):
+            if wanted:
+                where.append(f"{_quote(field)} = ?")
+                params.append(wanted)
+        if grade_level is not None:
+            where.append("grade_level = ?")
+            params.append(grade_level)
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+        conn = self.connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM dim_students{clause}", params).fetchone()[0]
+
+        # Python slice semantics (e.g. page 0 -> negative start)
+        window = range(total)[start:stop]
+        if not window:
+            return total, []
+        fields = self._columns["dim_students"]
+        cur = conn.execute(
+            f"SELECT rowid, {', '.join(map(_quote, fields))} FROM dim_students{clause} "
+            "ORDER BY rowid LIMIT ? OFFSET ?",
+            params + [len(window), window.start],
+        )
+        return total, self._rows("dim_students", fields, cur)
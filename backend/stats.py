@@ -0,0 +1,84 @@
+import math
+
+# -----------------------------------------------------------------------------
+# Mergeable single-pass statistics
+# -----------------------------------------------------------------------------
+
+
+class RunningStats:
+    """
+    Count, mean, sum of squared deviations from the mean (M2), min and max
+    of a stream of numbers.
+
+    Values are added one at a time with Welford's update, and two
+    accumulators (e.g. one per shard, partition or appended batch) combine
+    with Chan et al.'s parallel formula, so no pass ever has to be repeated
+    to get the variance.
+    """
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    @classmethod
+    def of_constant(cls, value, count: int) -> "RunningStats":
+        """
+        Stats of `count` copies of one value (e.g. one histogram bucket).
+        """
+        stats = cls()
+        if count > 0:
+            stats.count = count
+            stats.mean = float(value)
+            stats.min = stats.max = value
+        return stats
+
+    def push(self, value) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """
+        Fold another accumulator into this one (in place; returns self).
+        """
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """
+        Population variance (None when empty).
+        """
+        return self.m2 / self.count if self.count else None
+
+    @property
+    def sample_variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def stddev(self):
+        variance = self.variance
+        return math.sqrt(variance) if variance is not None else None
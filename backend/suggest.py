@@ -0,0 +1,210 @@
+import heapq
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+
+from columnar import INT_TYPECODE, NULL, ColumnTable
+
+# -----------------------------------------------------------------------------
+# Name-prefix index for student type-ahead
+# -----------------------------------------------------------------------------
+# Names are few compared to students, so the index is built over the distinct
+# first / last names: a sorted list of (lowercased) full names and name
+# tokens, searched by bisect. Per name it keeps the number of students and
+# (in memory mode) a sorted array of their row ids; counts of every
+# (first, last) pair make the number of distinct matching students exact
+# without touching any row.
+
+FIELDS = ("first_name", "last_name")
+
+
+class NameIndex:
+    """
+    names:    field -> list of names (a name's position is its code)
+    joint:    (first code, last code) -> number of students; None for a
+              missing name
+    postings: optional field -> code -> sorted row ids (array)
+    columns:  optional field -> per-row name code (NULL if missing)
+    """
+
+    def __init__(self, names: dict[str, list[str]], joint: dict, postings=None, columns=None):
+        self.names = {field: list(names[field]) for field in FIELDS}
+        self.joint = joint
+        self.postings = postings
+        self.columns = columns
+
+        self.counts = {field: [0] * len(self.names[field]) for field in FIELDS}
+        for (first, last), n in joint.items():
+            if first is not None:
+                self.counts["first_name"][first] += n
+            if last is not None:
+                self.counts["last_name"][last] += n
+
+        # (key, is_full_name, field, code), sorted by key for prefix search
+        entries = []
+        for field in FIELDS:
+            for code, name in enumerate(self.names[field]):
+                full = name.lower()
+                entries.append((full, True, field, code))
+                for token in set(full.split()) - {full}:
+                    entries.append((token, False, field, code))
+        entries.sort()
+        self._keys = [entry[0] for entry in entries]
+        self._entries = [entry[1:] for entry in entries]
+
+    @classmethod
+    def from_table(cls, students: ColumnTable) -> "NameIndex":
+        """
+        Build from the in-memory dim_students, including row postings.
+        """
+        first_col = students.columns["first_name"]
+        last_col = students.columns["last_name"]
+
+        joint = {
+            (None if first == NULL else first, None if last == NULL else last): n
+            for (first, last), n in Counter(zip(first_col, last_col)).items()
+        }
+        postings = {}
+        for field, col in (("first_name", first_col), ("last_name", last_col)):
+            lists = [array(INT_TYPECODE) for _ in students.dictionaries[field]]
+            appends = [rows.append for rows in lists]
+            for i, code in enumerate(col):
+                if code != NULL:
+                    appends[code](i)
+            postings[field] = lists
+
+        names = {field: students.dictionaries[field] for field in FIELDS}
+        return cls(names, joint, postings, {"first_name": first_col, "last_name": last_col})
+
+    @classmethod
+    def from_pairs(cls, pairs) -> "NameIndex":
+        """
+        Build from (first_name, last_name, count) rows, e.g. a GROUP BY.
+        """
+        pairs = list(pairs)
+        names = {
+            "first_name": sorted({first for first, _, _ in pairs if first}),
+            "last_name": sorted({last for _, last, _ in pairs if last}),
+        }
+        codes = {field: {name: code for code, name in enumerate(names[field])} for field in FIELDS}
+        joint: Counter = Counter()
+        for first, last, n in pairs:
+            joint[(codes["first_name"].get(first), codes["last_name"].get(last))] += n
+        return cls(names, dict(joint))
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Rough size of the index; the name columns it reads (memory mode)
+        belong to the table and are not counted.
+        """
+        total = sys.getsizeof(self.joint) + sum(sys.getsizeof(pair) for pair in self.joint)
+        total += sys.getsizeof(self._keys) + sum(sys.getsizeof(key) for key in self._keys)
+        total += sys.getsizeof(self._entries) + sum(sys.getsizeof(entry) for entry in self._entries)
+        for lists in (self.postings or {}).values():
+            total += sys.getsizeof(lists) + sum(memoryview(rows).nbytes for rows in lists)
+        return total
+
+    # -- matching -------------------------------------------------------------
+    def _prefixed(self, prefix: str, full_only: bool = False) -> dict[str, set]:
+        found = {field: set() for field in FIELDS}
+        i = bisect_left(self._keys, prefix)
+        while i < len(self._keys) and self._keys[i].startswith(prefix):
+            is_full, field, code = self._entries[i]
+            if is_full or not full_only:
+                found[field].add(code)
+            i += 1
+        return found
+
+    def match(self, query: str) -> tuple[set, set, bool]:
+        """
+        Name codes matching a search box query:
+        (first-name codes, last-name codes, both_required).
+        One word (or words that start a full name, e.g. "al sha") matches
+        either name; otherwise the first word is a first-name prefix and
+        the last word a last-name prefix, and both must match.
+        """
+        query = " ".join(query.lower().split())
+        words = query.split()
+        if not words:
+            return set(), set(), False
+        if len(words) == 1:
+            found = self._prefixed(query)
+            return found["first_name"], found["last_name"], False
+
+        found = self._prefixed(query, full_only=True)
+        if found["first_name"] or found["last_name"]:
+            return found["first_name"], found["last_name"], False
+        first = self._prefixed(words[0])["first_name"]
+        last = self._prefixed(words[-1])["last_name"]
+        return first, last, True
+
+    def count(self, first: set, last: set, both: bool) -> int:
+        """
+        Distinct students matching (first AND last if both, else OR).
+        """
+        # Students matching both names, from the (first, last) pair counts
+        overlap = 0
+        if first and last:
+            if len(first) * len(last) < len(self.joint):
+                overlap = sum(self.joint.get((f, l), 0) for f in first for l in last)
+            else:
+                overlap = sum(n for (f, l), n in self.joint.items() if f in first and l in last)
+        if both:
+            return overlap
+        return (
+            sum(self.counts["first_name"][f] for f in first)
+            + sum(self.counts["last_name"][l] for l in last)
+            - overlap
+        )
+
+    def top_names(self, first: set, last: set, both: bool, limit: int) -> list[dict]:
+        """
+        Most common matching names (or full-name pairs when both are
+        required) with their student counts.
+        """
+        if both:
+            candidates = [
+                {"first_name": self.names["first_name"][f], "last_name": self.names["last_name"][l], "count": n}
+                for (f, l), n in self.joint.items()
+                if f in first and l in last
+            ]
+            key = lambda c: (-c["count"], c["first_name"], c["last_name"])
+        else:
+            candidates = [
+                {"name": self.names[field][code], "field": field, "count": self.counts[field][code]}
+                for field, codes in (("first_name", first), ("last_name", last))
+                for code in codes
+            ]
+            key = lambda c: (-c["count"], c["name"], c["field"])
+        return heapq.nsmallest(limit, candidates, key=key)
+
+    def rows(self, first: set, last: set, both: bool, limit: int) -> list[int]:
+        """
+        First `limit` matching row ids in table order (memory mode only).
+        """
+        if both:
+            # Walk the side with fewer students, check the other name's code
+            if sum(self.counts["first_name"][f] for f in first) <= sum(self.counts["last_name"][l] for l in last):
+                walk, codes, check, wanted = "first_name", first, "last_name", last
+            else:
+                walk, codes, check, wanted = "last_name", last, "first_name", first
+            merged = heapq.merge(*(self.postings[walk][c] for c in codes))
+            column = self.columns[check]
+            return list(islice((i for i in merged if column[i] in wanted), limit))
+
+        merged = heapq.merge(
+            *(self.postings["first_name"][c] for c in first),
+            *(self.postings["last_name"][c] for c in last),
+        )
+        result = []
+        previous = None
+        for i in merged:
+            if i != previous:
+                result.append(i)
+                if len(result) == limit:
+                    break
+                previous = i
+        return result
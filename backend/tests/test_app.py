@@ -0,0 +1,188 @@
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Responses compared between storage modes
+ROUTES = [
+    "/students/count", "/grades/by-gender", "/grades/by-class", "/kpis/total-classes",
+    "/kpis/total-attendance", "/kpis/average-grade", "/students/by-nationality",
+    "/students/by-grade-level", "/students/list", "/students/list?search=sa&gender=F&page=2&per_page=7",
+    "/students/list?nationality=Omani&grade_level=4", "/grades/distribution", "/grades/trend-by-date",
+    "/attendance/by-month", "/attendance/by-weekday", "/attendance/by-semester",
+    "/classes/students-per-class", "/classes/by-grade-level", "/semesters/list",
+    "/grades/timeseries?freq=week&window=7", "/grades/timeseries?freq=semester",
+    "/grades/pivot?dims=gender,grade_level,semester", "/grades/pivot?dims=class&drill=gender:F",
+    "/grades/pivot?dims=nationality,month", "/students/suggest?q=sa", "/students/suggest?q=al%20s",
+    "/classes/1", "/classes/3?freq=week&page=2&per_page=5", "/classes/4?freq=semester", "/classes/999",
+    "/data-quality", "/debug/sample", "/students/list?per_page=1000",
+]
+
+# student_id values the packed int32 columns cannot hold
+BIG_IDS = {7: "3000000000", 8: "99999999999999999999999", 9: "12x"}
+
+FIRST_NAMES = ["Sara", "Saif", "Ali", "Alia", "Fatima", "Omar", ""]
+LAST_NAMES = ["Al Shamsi", "Al Murri", "Qasim", "Salem", ""]
+
+
+def write_csv(path: Path, header: list[str], rows) -> None:
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_dataset(data_dir: Path) -> None:
+    """
+    A small star schema with the dirt real extracts have: blank names and
+    categories, unparsable dates, NULL / orphan keys, out-of-range ints, NULL
+    and outlier grades.
+    """
+    rng = random.Random(7)
+    write_csv(data_dir / "dim_classes.csv", ["class_key", "class_id", "class_name", "grade_level"], [
+        [1, 1, "Grade 1 - Section A", 1], [2, 2, "Grade 1 - Section B", 1], [3, 3, "", 2],
+        [4, 4, "Grade 4 - Section A", 4], [5, 4, "Grade 4 - Section A", 4], [6, 5, "Grade 5 - Section A", ""],
+    ])
+    write_csv(data_dir / "dim_semesters.csv", ["semester_key", "semester_id", "semester_name", "start_date", "end_date"], [
+        [1, 1, "Spring 2024", "2024-01-01", "2024-02-15"], [2, 2, "Summer 2024", "2024-02-16", "2024-03-31"],
+        [3, 3, "Fall 2024", "not a date", "2024-12-20"],
+    ])
+    first = date(2024, 1, 1)
+    write_csv(data_dir / "dim_date.csv", ["date_key", "date_value", "year", "month", "day", "day_of_week"], [
+        [k, "" if k == 50 else (first + timedelta(days=k - 1)).isoformat(),
+         (first + timedelta(days=k - 1)).year, (first + timedelta(days=k - 1)).month,
+         (first + timedelta(days=k - 1)).day, (first + timedelta(days=k - 1)).strftime("%A")]
+        for k in range(1, 91)
+    ])
+    write_csv(data_dir / "dim_students.csv", [
+        "student_key", "student_id", "first_name", "last_name", "gender", "nationality",
+        "birthdate", "grade_level", "class_id",
+    ], [
+        [k, BIG_IDS.get(k, k), rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.choice(["F", "M", "F", "M", ""]),
+         rng.choice(["Emirati", "Omani", "Indian", ""]), rng.choice(["2012-05-01", "2015-11-30", "n/a", ""]),
+         rng.choice([1, 2, 4, 5, ""]), rng.choice([1, 2, 3, 4, 5, 99])]
+        for k in range(1, 301)
+    ])
+    write_csv(data_dir / "fact_attendance.csv", [
+        "attendance_id", "student_key", "class_key", "semester_key", "date_key", "grade",
+    ], [
+        [i, rng.choice([rng.randint(1, 300)] * 20 + [0, ""]), rng.choice([1, 2, 3, 4, 5, 6] * 5 + [77]),
+         rng.choice([1, 2, 3, 1, 2, ""]), rng.choice([rng.randint(1, 90)] * 30 + [500]),
+         rng.choice([rng.randint(40, 100)] * 40 + ["", 999])]
+        for i in range(1, 3001)
+    ] + [[2 ** 31, "3000000000", 1, 1, 1, 80]])
+
+
+# Imports the app (which loads the tables), then prints {route: [status, json]}
+SNAPSHOT = """
+import json, sys
+import app
+app.wait_until_loaded()
+client = app.app.test_client()
+out = {}
+for route in json.loads(sys.argv[1]):
+    response = client.get(route)
+    out[route] = [response.status_code, response.get_json()]
+print("SNAPSHOT " + json.dumps(out, sort_keys=True))
+"""
+
+
+# Keeps the only compute slot busy, then asks for an aggregation
+BUSY = """
+import json, sys, threading, time
+import app
+app.wait_until_loaded()
+release = threading.Event()
+threading.Thread(target=app.compute_pool.run, args=(("busy",), release.wait, 30)).start()
+while app.compute_pool.stats()["inflight"] == 0:
+    time.sleep(0.01)
+out = {}
+for route in json.loads(sys.argv[1]):
+    response = app.app.test_client().get(route)
+    out[route] = [response.status_code, response.get_json(), response.headers.get("Retry-After")]
+release.set()
+print("SNAPSHOT " + json.dumps(out, sort_keys=True))
+"""
+
+
+def run_app(data_dir: Path, routes: list[str], script: str = SNAPSHOT, **env) -> dict:
+    env = {
+        **os.environ, "API_DATA_DIR": str(data_dir), "API_SCAN_WORKERS": "1",
+        "API_BACKGROUND_LOAD": "0", **env,
+    }
+    done = subprocess.run(
+        [sys.executable, "-c", script, json.dumps(routes)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=300,
+    )
+    assert done.returncode == 0, done.stderr
+    line = next(line for line in done.stdout.splitlines() if line.startswith("SNAPSHOT "))
+    return json.loads(line[len("SNAPSHOT "):])
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory) -> Path:
+    data_dir = tmp_path_factory.mktemp("clean")
+    write_dataset(data_dir)
+    return data_dir
+
+
+@pytest.fixture(scope="module")
+def snapshots(dataset, tmp_path_factory) -> tuple[dict, dict]:
+    sqlite_path = tmp_path_factory.mktemp("sqlite") / "school.sqlite"
+    memory = run_app(dataset, ROUTES)
+    sqlite = run_app(dataset, ROUTES, API_STORAGE="sqlite", API_SQLITE_PATH=str(sqlite_path))
+    return memory, sqlite
+
+
+@pytest.mark.parametrize("route", ROUTES)
+def test_memory_and_sqlite_responses_match(snapshots, route):
+    memory, sqlite = snapshots
+    if route == "/data-quality":
+        # Only memory mode builds exception bitmaps
+        for snapshot in (memory, sqlite):
+            for report in snapshot[route][1]["tables"].values():
+                report.pop("exception_bitmap_bytes", None)
+    assert memory[route][0] in (200, 404)
+    assert memory[route] == sqlite[route]
+
+
+def test_student_rows_keep_csv_values(dataset, snapshots):
+    """
+    Rows read back as the original list-of-dicts loader built them: INT
+    columns cast (None when blank or invalid), everything else as in the CSV.
+    """
+    with (dataset / "dim_students.csv").open(newline="", encoding="utf-8") as f:
+        expected = [
+            {
+                col: (int(val) if val.lstrip("-").isdigit() else None)
+                if col in ("student_key", "student_id", "grade_level", "class_id") else val
+                for col, val in record.items()
+            }
+            for record in csv.DictReader(f)
+        ]
+    assert {"", "n/a"} <= {row["birthdate"] for row in expected}
+    assert {row["student_id"] for row in expected[6:9]} == {3000000000, 99999999999999999999999, None}
+    for snapshot in snapshots:
+        assert snapshot["/students/list?per_page=1000"][1]["data"] == expected
+        assert snapshot["/debug/sample"][1]["dim_students"]["head"] == expected[:3]
+
+
+def test_full_compute_pool_answers_503_with_retry_after(dataset):
+    busy = run_app(
+        dataset, ["/grades/by-gender", "/semesters/list"], script=BUSY,
+        API_COMPUTE_WORKERS="1", API_COMPUTE_QUEUE="0",
+    )
+    status, body, retry_after = busy["/grades/by-gender"]
+    assert status == 503
+    assert body["error"] == "Server busy, retry later"
+    assert retry_after == "1"
+    # Endpoints that do not aggregate on the pool keep answering
+    assert busy["/semesters/list"][0] == 200
@@ -0,0 +1,39 @@
+from columnar import CATEGORY, DATE, INT, NULL, STR, ColumnTable
+
+SCHEMA = {"id": INT, "name": STR, "gender": CATEGORY, "born": DATE}
+
+
+def table(*records) -> ColumnTable:
+    t = ColumnTable("t", SCHEMA, header=["id", "name", "gender", "born"])
+    for record in records:
+        t.append_record(list(record))
+    return t
+
+
+def test_rows_keep_what_the_csv_held():
+    t = table(
+        ["1", "Sara", "F", "2012-05-01"],
+        ["", "", "", ""],
+        ["x", "Ali", "M", "n/a"],
+        ["3000000000", "Omar"],
+    )
+    assert t.row(0) == {"id": 1, "name": "Sara", "gender": "F", "born": "2012-05-01"}
+    assert t.row(1) == {"id": None, "name": "", "gender": "", "born": ""}
+    assert t.row(2) == {"id": None, "name": "Ali", "gender": "M", "born": "n/a"}
+    # Short record: the missing cells are None, as csv.DictReader gives them
+    assert t.row(3) == {"id": 3000000000, "name": "Omar", "gender": None, "born": None}
+
+
+def test_scans_see_null_for_kept_values():
+    t = table(["3000000000", "a", "", "n/a"], ["5", "b", "F", "2012-05-01"])
+    assert list(t.columns["id"]) == [NULL, 5]
+    assert t.columns["gender"][0] == NULL
+    assert t.columns["born"][0] == NULL
+    assert t.dictionaries["gender"] == ["F"]
+    assert t.column_range("id") == (5, 5)
+
+
+def test_nbytes_counts_kept_values():
+    clean = table(*[["1", "a", "F", "2012-05-01"]] * 10)
+    dirty = table(*[["3000000000", "a", "", "n/a"]] * 10)
+    assert dirty.nbytes() > clean.nbytes()
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from compute import ComputePool, ComputeUnavailable
+
+
+def wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_identical_calls_share_one_computation():
+    pool = ComputePool(workers=2, max_queue=0)
+    release = threading.Event()
+    calls = []
+
+    def slow(x):
+        calls.append(x)
+        release.wait(5)
+        return x * 2
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.run(("k", 21), slow, 21))) for _ in range(4)]
+    threads[0].start()
+    wait_for(lambda: calls)
+    for t in threads[1:]:
+        t.start()
+    wait_for(lambda: sum(t.is_alive() for t in threads) == 4)
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert calls == [21]
+    assert sorted(results) == [(42, False), (42, True), (42, True), (42, True)]
+    assert pool.stats()["inflight"] == 0
+
+
+def test_different_keys_compute_separately():
+    pool = ComputePool(workers=2, max_queue=0)
+    assert pool.run(("a",), lambda: 1) == (1, False)
+    assert pool.run(("b",), lambda: 2) == (2, False)
+    assert pool.run(("a",), lambda: 3) == (3, False)
+
+
+def test_full_queue_is_rejected_and_slots_come_back():
+    pool = ComputePool(workers=1, max_queue=1, retry_after=7)
+    release = threading.Event()
+    threads = [
+        threading.Thread(target=pool.run, args=((key,), release.wait, 5)) for key in ("a", "b")
+    ]
+    for t in threads:
+        t.start()
+    wait_for(lambda: pool.stats()["inflight"] == 2)
+
+    with pytest.raises(ComputeUnavailable) as exc:
+        pool.run(("c",), lambda: 0)
+    assert exc.value.retry_after == 7
+    # Joining a running computation needs no slot
+    joiner = threading.Thread(target=pool.run, args=(("a",), release.wait, 5))
+    joiner.start()
+
+    release.set()
+    for t in [*threads, joiner]:
+        t.join(5)
+    wait_for(lambda: pool.stats()["inflight"] == 0)
+    assert pool.run(("c",), lambda: 0) == (0, False)
+    assert pool.run(("d",), lambda: 1) == (1, False)
+
+
+def test_timeout_raises_unavailable():
+    pool = ComputePool(workers=1, max_queue=0, timeout=0.05)
+    release = threading.Event()
+    with pytest.raises(ComputeUnavailable, match="timed out"):
+        pool.run(("slow",), release.wait, 5)
+    release.set()
+    wait_for(lambda: pool.stats()["inflight"] == 0)
+
+
+def test_failed_computation_is_not_kept():
+    pool = ComputePool(workers=1, max_queue=0)
+
+    def boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        pool.run(("k",), boom)
+    wait_for(lambda: pool.stats()["inflight"] == 0)
+    assert pool.run(("k",), lambda: "ok") == ("ok", False)
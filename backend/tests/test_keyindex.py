@@ -0,0 +1,54 @@
+import random
+from array import array
+from collections import defaultdict
+
+from columnar import INT_TYPECODE, NULL
+from keyindex import KeyIndex
+
+
+def direct_rows(keys) -> dict:
+    rows = defaultdict(list)
+    for i, k in enumerate(keys):
+        if k != NULL:
+            rows[k].append(i)
+    return rows
+
+
+def test_rows_and_counts_match_direct_grouping():
+    rng = random.Random(1)
+    keys = array(INT_TYPECODE, (rng.choice([NULL, 1, 2, 3, 7, 40]) for _ in range(2000)))
+    index = KeyIndex.build(keys)
+    expected = direct_rows(keys)
+
+    assert list(index.counts()) == [(k, len(rows)) for k, rows in sorted(expected.items())]
+    for k, rows in expected.items():
+        assert list(index.rows_of(k)) == rows
+        assert index.count(k) == len(rows)
+        assert k in index
+    assert len(index.rows) == sum(len(rows) for rows in expected.values())
+
+
+def test_missing_keys():
+    index = KeyIndex.build([5, 9, 5])
+    for key in (NULL, 0, 4, 6, 8, 10, 2 ** 31 - 1):
+        assert key not in index
+        assert index.count(key) == 0
+        assert list(index.rows_of(key)) == []
+
+
+def test_outlier_keys_take_one_slot_each():
+    # Keys at both ends of the int32 range: memory follows the distinct keys
+    keys = [3, 2 ** 31 - 1, 3, -(2 ** 31) + 1, NULL, 2_000_000_000]
+    index = KeyIndex.build(keys)
+    assert list(index.keys) == [-(2 ** 31) + 1, 3, 2_000_000_000, 2 ** 31 - 1]
+    assert len(index.starts) == 5
+    assert list(index.rows_of(2 ** 31 - 1)) == [1]
+    assert list(index.rows_of(3)) == [0, 2]
+    assert index.nbytes < 100
+
+
+def test_empty_and_all_null():
+    for keys in ([], [NULL, NULL]):
+        index = KeyIndex.build(keys)
+        assert list(index.counts()) == []
+        assert index.count(1) == 0 and list(index.rows_of(1)) == []
@@ -0,0 +1,73 @@
+import random
+from collections import defaultdict
+from itertools import combinations
+
+import pytest
+
+from pivot import Cube
+
+
+def make_cube(seed: int) -> tuple[Cube, list]:
+    rng = random.Random(seed)
+    labels = [["F", "M", None], [1, 2, 3, 4], [(2024, 1), (2024, 2)]]
+    groups = [
+        ((a, b, c), rng.randint(0, 500), rng.randint(1, 9))
+        for a in labels[0] for b in labels[1] for c in labels[2]
+        if rng.random() < 0.7  # leave some cells empty
+    ]
+    return Cube.from_groups(["gender", "level", "month"], groups, skipped=4), groups
+
+
+def expected(groups, dims, keep, fixed=None) -> dict:
+    fixed = fixed or {}
+    cells = defaultdict(lambda: [0, 0])
+    for labels, total, n in groups:
+        by_dim = dict(zip(dims, labels))
+        if any(by_dim[dim] != label for dim, label in fixed.items()):
+            continue
+        cell = cells[tuple(by_dim[dim] for dim in keep)]
+        cell[0] += total
+        cell[1] += n
+    return {labels: tuple(cell) for labels, cell in cells.items()}
+
+
+def cells_of(cube: Cube) -> dict:
+    return {labels: (total, n) for labels, total, n in cube.cells()}
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_cells_round_trip(seed):
+    cube, groups = make_cube(seed)
+    assert cells_of(cube) == {labels: (total, n) for labels, total, n in groups}
+
+
+@pytest.mark.parametrize("keep", [["gender"], ["month", "gender"], ["level", "month"], ["month", "level", "gender"]])
+@pytest.mark.parametrize("seed", range(3))
+def test_project_matches_direct_sums(seed, keep):
+    cube, groups = make_cube(seed)
+    view = cube.project(keep)
+    assert view.dims == keep
+    assert cells_of(view) == expected(groups, cube.dims, keep)
+    assert (view.total_sum, view.total_count, view.skipped) == (cube.total_sum, cube.total_count, 4)
+
+
+@pytest.mark.parametrize("fixed", [{"gender": None}, {"month": (2024, 2)}, {"gender": "M", "month": (2024, 1)}])
+def test_project_with_drill_down(fixed):
+    cube, groups = make_cube(7)
+    assert cells_of(cube.project(["level"], fixed)) == expected(groups, cube.dims, ["level"], fixed)
+
+
+def test_project_unknown_drill_label_is_empty():
+    cube, _ = make_cube(0)
+    view = cube.project(["level"], {"gender": "X"})
+    assert view.total_count == 0 and not cells_of(view)
+
+
+def test_rollups_match_projections():
+    cube, groups = make_cube(11)
+    rollups = list(cube.rollups())
+    assert [dims for dims, _ in rollups] == [
+        list(keep) for size in (2, 1) for keep in combinations(cube.dims, size)
+    ]
+    for dims, sub in rollups:
+        assert cells_of(sub) == expected(groups, cube.dims, dims)
@@ -0,0 +1,149 @@
+import random
+from collections import defaultdict
+
+import pytest
+
+from columnar import INT, NULL, ColumnTable
+from scan import DENSE_MAX_EXCEPTIONS, ScanEngine, _null_rows, scan_cube_range, scan_range
+
+
+def make_table(n: int, seed: int) -> ColumnTable:
+    """
+    Keys k (no NULLs), j and value v (a few NULLs each, well under
+    DENSE_MAX_EXCEPTIONS so the dense path applies once NULLs are indexed).
+    """
+    rng = random.Random(seed)
+    table = ColumnTable("t", {"k": INT, "j": INT, "v": INT})
+
+    def maybe_null(value):
+        return "" if rng.random() < 0.02 else str(value)
+
+    for _ in range(n):
+        table.append_record([str(rng.randint(3, 9)), maybe_null(rng.randint(-2, 4)), maybe_null(rng.randint(0, 100))])
+    # NULLs right at the start and end of the table
+    table.columns["j"][0] = NULL
+    table.columns["v"][n - 1] = NULL
+    return table
+
+
+def expected_groups(table: ColumnTable, key, value) -> tuple[dict, int]:
+    groups = defaultdict(lambda: [0, 0])
+    skipped = 0
+    keys = table.columns[key] if key is not None else [0] * len(table)  # one group, key 0
+    values = table.columns[value] if value is not None else [0] * len(table)
+    for k, v in zip(keys, values):
+        if k == NULL or v == NULL:
+            skipped += 1
+            continue
+        groups[k][0] += v
+        groups[k][1] += 1
+    return {k: tuple(agg) for k, agg in groups.items()}, skipped
+
+
+def group_result(agg) -> tuple[dict, int]:
+    return {k: (total, n) for k, total, n in agg.items()}, agg.skipped
+
+
+def cube_result(offsets, shape, agg) -> tuple[list, list, int]:
+    return offsets, shape, (agg.sums, agg.counts, agg.skipped)
+
+
+@pytest.fixture(params=[1, 3], ids=["serial", "sharded"])
+def engine(request):
+    # Small shards so several shard boundaries fall inside the test tables
+    engine = ScanEngine(workers=request.param, min_shard_rows=200)
+    yield engine
+    engine.close()
+
+
+@pytest.mark.parametrize("key,value", [("k", "v"), ("j", "v"), ("j", None), (None, "v"), ("k", None)])
+def test_group_sum_count_dense_matches_null_checks(engine, key, value):
+    table = make_table(1500, seed=1)
+    checked = group_result(engine.group_sum_count(table, key=key, value=value))
+
+    table.index_nulls()
+    assert _null_rows(table, [key, value]) is not None  # dense path taken
+    dense = group_result(engine.group_sum_count(table, key=key, value=value))
+
+    assert checked == dense == expected_groups(table, key, value)
+
+
+@pytest.mark.parametrize("keys,value,nullable", [
+    (["k", "j"], "v", ()),
+    (["j", "k"], "v", ("j",)),
+    (["k", "j"], None, ("j",)),
+    (["j"], None, ()),
+])
+def test_cube_sum_count_dense_matches_null_checks(engine, keys, value, nullable):
+    table = make_table(1500, seed=2)
+    checked = cube_result(*engine.cube_sum_count(table, keys, value, nullable))
+
+    table.index_nulls()
+    dense = cube_result(*engine.cube_sum_count(table, keys, value, nullable))
+
+    assert checked == dense
+    sums, counts, skipped = dense[2]
+    values = table.columns[value] if value is not None else [0] * len(table)
+    rows = sum(
+        1 for i, v in enumerate(values)
+        if v != NULL and all(table.columns[key][i] != NULL or key in nullable for key in keys)
+    )
+    assert sum(counts) == rows
+    assert skipped == len(table) - rows
+
+
+def test_too_many_nulls_fall_back_to_null_checks(engine):
+    table = make_table(1000, seed=3)
+    for i in range(0, len(table), 4):
+        table.columns["j"][i] = NULL
+    table.index_nulls()
+    assert len(table.null_rows["j"]) > len(table) * DENSE_MAX_EXCEPTIONS
+    assert _null_rows(table, ["j", "v"]) is None
+    assert group_result(engine.group_sum_count(table, key="j", value="v")) == expected_groups(table, "j", "v")
+
+
+@pytest.mark.parametrize("lo,hi", [(0, 500), (1, 499), (137, 138), (250, 250), (0, 1)])
+def test_scan_range_exceptions_match_null_checks(lo, hi):
+    table = make_table(500, seed=4)
+    table.index_nulls()
+    keys, values = table.columns["j"], table.columns["v"]
+    offset, last = table.column_range("j")
+    exceptions = (table.null_rows["j"] | table.null_rows["v"]).rows(lo, hi)
+
+    checked = scan_range(keys, values, lo, hi, offset, last - offset + 1)
+    dense = scan_range(keys, values, lo, hi, offset, last - offset + 1, exceptions)
+    assert checked == dense
+
+    # Count-only and single-group variants of the kernel
+    key_exceptions = table.null_rows["j"].rows(lo, hi)
+    assert scan_range(keys, None, lo, hi, offset, last - offset + 1) == \
+        scan_range(keys, None, lo, hi, offset, last - offset + 1, key_exceptions)
+    value_exceptions = table.null_rows["v"].rows(lo, hi)
+    assert scan_range(None, values, lo, hi, 0, 1) == scan_range(None, values, lo, hi, 0, 1, value_exceptions)
+
+
+@pytest.mark.parametrize("lo,hi", [(0, 400), (13, 377)])
+def test_scan_cube_range_exceptions_match_null_checks(lo, hi):
+    table = make_table(400, seed=5)
+    table.index_nulls()
+    k, j, v = table.columns["k"], table.columns["j"], table.columns["v"]
+    (k_lo, k_hi), (j_lo, j_hi) = table.column_range("k"), table.column_range("j")
+    j_size = j_hi - j_lo + 1
+
+    # j NULL skipped: both NULL bitmaps are exceptions, no key checks NULL
+    size = (k_hi - k_lo + 1) * j_size
+    exceptions = (table.null_rows["j"] | table.null_rows["v"]).rows(lo, hi)
+    checked = scan_cube_range([k, j], [k_lo, j_lo], [j_size, 1], v, lo, hi, size)
+    dense = scan_cube_range([k, j], [k_lo, j_lo], [j_size, 1], v, lo, hi, size,
+                            dense=[True, True], exceptions=exceptions)
+    assert checked == dense
+
+    # j NULL kept in its own last slot: only v's NULLs are exceptions
+    size = (k_hi - k_lo + 1) * (j_size + 1)
+    null_slots = [None, j_size]
+    exceptions = table.null_rows["v"].rows(lo, hi)
+    checked = scan_cube_range([k, j], [k_lo, j_lo], [j_size + 1, 1], v, lo, hi, size, null_slots)
+    dense = scan_cube_range([k, j], [k_lo, j_lo], [j_size + 1, 1], v, lo, hi, size, null_slots,
+                            dense=[True, False], exceptions=exceptions)
+    assert checked == dense
+    assert sum(checked[1][j_size::j_size + 1]) > 0  # NULL slot in use
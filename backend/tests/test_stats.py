@@ -0,0 +1,58 @@
+import random
+import statistics
+
+import pytest
+
+from stats import RunningStats
+
+
+def stats_of(values) -> RunningStats:
+    stats = RunningStats()
+    for value in values:
+        stats.push(value)
+    return stats
+
+
+def assert_matches(stats: RunningStats, values):
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(statistics.fmean(values))
+    assert stats.variance == pytest.approx(statistics.pvariance(values))
+    assert stats.sample_variance == pytest.approx(statistics.variance(values))
+    assert stats.stddev == pytest.approx(statistics.pstdev(values))
+    assert (stats.min, stats.max) == (min(values), max(values))
+
+
+def test_push_matches_direct_variance():
+    rng = random.Random(1)
+    values = [rng.randint(40, 100) for _ in range(1000)]
+    assert_matches(stats_of(values), values)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_merge_matches_direct_variance(seed):
+    rng = random.Random(seed)
+    # Partitions of very different sizes and means, some empty
+    parts = [
+        [rng.gauss(rng.uniform(-50, 1000), rng.uniform(0, 30)) for _ in range(rng.choice([0, 1, 2, 17, 500]))]
+        for _ in range(8)
+    ]
+    merged = RunningStats()
+    for part in parts:
+        merged.merge(stats_of(part))
+    assert_matches(merged, [v for part in parts for v in part])
+
+
+def test_merge_of_constant_buckets():
+    # A histogram (value -> count) merged bucket by bucket, as grade_stats_by does
+    histogram = {40: 3, 55: 10, 71: 1, 100: 6}
+    merged = RunningStats()
+    for value, n in histogram.items():
+        merged.merge(RunningStats.of_constant(value, n))
+    assert_matches(merged, [v for v, n in histogram.items() for _ in range(n)])
+
+
+def test_empty():
+    stats = RunningStats().merge(RunningStats()).merge(RunningStats.of_constant(5, 0))
+    assert stats.count == 0
+    assert stats.variance is None and stats.sample_variance is None and stats.stddev is None
+    assert stats.min is None and stats.max is None
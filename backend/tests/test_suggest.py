@@ -0,0 +1,131 @@
+import csv
+import random
+
+import pytest
+
+from columnar import CATEGORY, INT, ColumnTable
+from sqlstore import SqlStore
+from suggest import NameIndex
+
+FIRST_NAMES = ["Sara", "Saif", "Ali", "Alia", "Fatima", "Omar", "Noor Al", ""]
+LAST_NAMES = ["Al Shamsi", "Al Murri", "Qasim", "Salem", "Shah", ""]
+QUERIES = ["sa", "SA", "al", "al sh", "al m", "sara al", "saif q", "s s", "noor al", "  ALI  ", "x", "o x", "fat q", ""]
+
+
+@pytest.fixture(scope="module")
+def students():
+    rng = random.Random(1)
+    table = ColumnTable("dim_students", {"student_key": INT, "first_name": CATEGORY, "last_name": CATEGORY})
+    for key in range(1, 1201):
+        table.append_record([str(key), rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)])
+    return table
+
+
+def starts(name, prefix: str, full_only: bool) -> bool:
+    if not name:
+        return False
+    name = name.lower()
+    return name.startswith(prefix) or (not full_only and any(t.startswith(prefix) for t in name.split()))
+
+
+def expected_rows(students, query: str) -> list[int]:
+    """
+    The type-ahead rules applied row by row (see NameIndex.match).
+    """
+    query = " ".join(query.lower().split())
+    words = query.split()
+    rows = [students.row(i) for i in range(len(students))]
+    if not words:
+        return []
+
+    def either(prefix, full_only):
+        return [i for i, r in enumerate(rows)
+                if starts(r["first_name"], prefix, full_only) or starts(r["last_name"], prefix, full_only)]
+
+    if len(words) == 1:
+        return either(query, False)
+    full = either(query, True)
+    if full:
+        return full
+    return [i for i, r in enumerate(rows)
+            if starts(r["first_name"], words[0], False) and starts(r["last_name"], words[-1], False)]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_match_count_and_rows(students, query):
+    index = NameIndex.from_table(students)
+    first, last, both = index.match(query)
+    expected = expected_rows(students, query)
+    assert index.count(first, last, both) == len(expected)
+    assert index.rows(first, last, both, 10) == expected[:10]
+    assert index.rows(first, last, both, 10 ** 6) == expected
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_top_names(students, query):
+    index = NameIndex.from_table(students)
+    first, last, both = index.match(query)
+    expected = [students.row(i) for i in expected_rows(students, query)]
+    for entry in index.top_names(first, last, both, 50):
+        if both:
+            n = sum(1 for r in expected if (r["first_name"], r["last_name"]) == (entry["first_name"], entry["last_name"]))
+        else:
+            n = sum(1 for r in students if r[entry["field"]] == entry["name"])
+        assert entry["count"] == n
+    counts = [entry["count"] for entry in index.top_names(first, last, both, 50)]
+    assert counts == sorted(counts, reverse=True)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_from_pairs_matches_from_table(students, query):
+    # SQLite mode builds the index from a (first, last, count) GROUP BY
+    pairs = {}
+    for r in students:
+        key = (r["first_name"], r["last_name"])
+        pairs[key] = pairs.get(key, 0) + 1
+    from_pairs = NameIndex.from_pairs((f, l, n) for (f, l), n in pairs.items())
+    from_table = NameIndex.from_table(students)
+
+    assert from_pairs.count(*from_pairs.match(query)) == from_table.count(*from_table.match(query))
+    assert from_pairs.top_names(*from_pairs.match(query), 5) == from_table.top_names(*from_table.match(query), 5)
+
+
+@pytest.fixture(scope="module")
+def store(students, tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("sqlite")
+    path = tmp / "dim_students.csv"
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["student_key", "first_name", "last_name"])
+        for r in students:
+            writer.writerow([r["student_key"], r["first_name"] or "", r["last_name"] or ""])
+    store = SqlStore(tmp / "test.sqlite")
+    store.import_csv("dim_students", path, {"student_key": INT, "first_name": CATEGORY, "last_name": CATEGORY},
+                     indexes=[("first_name",), ("last_name",)])
+    return store
+
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("limit", [1, 10, 10 ** 6])
+def test_students_named_matches_index_rows(students, store, query, limit):
+    index = NameIndex.from_table(students)
+    first, last, both = index.match(query)
+    names = [sorted(index.names[field][c] for c in codes) for field, codes in (("first_name", first), ("last_name", last))]
+    found = store.students_named(*names, both, limit)
+    assert [r["student_key"] for r in found] == [students.row(i)["student_key"] for i in index.rows(first, last, both, limit)]
+
+
+@pytest.mark.parametrize("both", [False, True])
+def test_students_named_reads_the_name_indexes(store, both):
+    conn = store.connect()
+    statements = []
+    conn.set_trace_callback(statements.append)  # SQL with its parameters filled in
+    try:
+        store.students_named(["Omar"], ["Salem"], both, 10)
+    finally:
+        conn.set_trace_callback(None)
+    query = next(sql for sql in statements if "FROM dim_students" in sql)
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+    details = [detail for *_, detail in plan]
+    assert any("ix_dim_students_" in detail for detail in details)
+    assert not any(detail.startswith("SCAN dim_students") for detail in details)
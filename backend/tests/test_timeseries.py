@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+
+import pytest
+
+from timeseries import PrefixSeries, day_buckets, month_buckets, period_buckets, week_buckets
+
+FIRST = date(2024, 1, 30)
+# (day, sum, count) over 40 days from FIRST with a 5-day gap; two points on FIRST
+POINTS = [(FIRST + timedelta(days=i), 10 * i, i % 3 + 1) for i in range(40) if not 10 <= i < 15] + [(FIRST, 5, 1)]
+
+
+def make_series() -> PrefixSeries:
+    return PrefixSeries.from_points(POINTS)
+
+
+def direct_total(points, lo: date, hi: date) -> tuple[int, int]:
+    return (
+        sum(total for day, total, _ in points if lo <= day <= hi),
+        sum(n for day, _, n in points if lo <= day <= hi),
+    )
+
+
+def test_from_points_dense_axis():
+    series = make_series()
+    assert (series.first_day, series.days, series.last_day) == (FIRST, 40, FIRST + timedelta(days=39))
+
+
+@pytest.mark.parametrize("lo,hi", [(0, 0), (0, 39), (3, 12), (10, 14), (-5, 2), (38, 60), (-100, 100), (20, 19)])
+def test_total_matches_direct_sums(lo, hi):
+    start, end = FIRST + timedelta(days=lo), FIRST + timedelta(days=hi)
+    assert make_series().total(start, end) == direct_total(POINTS, start, end)
+
+
+@pytest.mark.parametrize("end,days", [(0, 1), (5, 3), (39, 7), (12, 5), (39, 40), (3, 1000), (50, 20), (-1, 5)])
+def test_trailing_matches_direct_sums(end, days):
+    end_day = FIRST + timedelta(days=end)
+    assert make_series().trailing(end_day, days) == \
+        direct_total(POINTS, end_day - timedelta(days=days - 1), end_day)
+
+
+def test_trailing_window_longer_than_the_calendar():
+    # No date arithmetic on the window: reaching back past date.min is fine
+    series = make_series()
+    assert series.trailing(series.last_day, 10 ** 9) == series.total(series.first_day, series.last_day)
+
+
+def test_empty_series():
+    series = PrefixSeries.from_points([])
+    assert series.days == 0
+    assert series.total(date(2024, 1, 1), date(2024, 12, 31)) == (0, 0)
+    assert series.trailing(date(2024, 1, 1), 30) == (0, 0)
+
+
+def covered_days(buckets) -> list[date]:
+    days = []
+    for _, lo, hi in buckets:
+        days.extend(lo + timedelta(days=i) for i in range((hi - lo).days + 1))
+    return days
+
+
+@pytest.mark.parametrize("buckets", [day_buckets, week_buckets, month_buckets])
+def test_calendar_buckets_tile_the_range(buckets):
+    start, end = date(2023, 12, 27), date(2024, 3, 3)
+    assert covered_days(buckets(start, end)) == covered_days(day_buckets(start, end))
+
+
+def test_bucket_labels():
+    assert [label for label, _, _ in week_buckets(date(2024, 12, 28), date(2025, 1, 6))] == \
+        ["2024-W52", "2025-W01", "2025-W02"]
+    assert list(month_buckets(date(2024, 1, 31), date(2024, 3, 1))) == [
+        ("2024-01", date(2024, 1, 31), date(2024, 1, 31)),
+        ("2024-02", date(2024, 2, 1), date(2024, 2, 29)),
+        ("2024-03", date(2024, 3, 1), date(2024, 3, 1)),
+    ]
+
+
+def test_period_buckets_overlap_sorted_and_clipped():
+    periods = [("Spring", date(2024, 2, 1), date(2024, 6, 30)), ("Fall", date(2023, 9, 1), date(2024, 1, 31)),
+               ("Summer", date(2024, 7, 1), date(2024, 8, 31))]
+    assert list(period_buckets(periods, date(2024, 1, 15), date(2024, 3, 1))) == [
+        ("Fall", date(2024, 1, 15), date(2024, 1, 31)),
+        ("Spring", date(2024, 2, 1), date(2024, 3, 1)),
+    ]
@@ -0,0 +1,113 @@
+from datetime import date, timedelta
+from itertools import accumulate
+
+# -----------------------------------------------------------------------------
+# Daily prefix-sum series + calendar buckets for resampling
+# -----------------------------------------------------------------------------
+# A series keeps running totals of a daily sum and count, so the total over
+# any day range (a bucket, a moving-average window) is two subtractions no
+# matter how many fact rows fell into it.
+
+
+class PrefixSeries:
+    """
+    Daily sum / count of a measure as prefix sums over a dense day axis
+    (first_day .. first_day + days - 1; days without data count as zero).
+    """
+
+    def __init__(self, first_day: date, sums: list[int], counts: list[int]):
+        self.first_day = first_day
+        self.days = len(sums)
+        self._sums = list(accumulate(sums, initial=0))
+        self._counts = list(accumulate(counts, initial=0))
+
+    @classmethod
+    def from_points(cls, points) -> "PrefixSeries":
+        """
+        Build from (day, sum, count) points; points on the same day add up.
+        """
+        points = list(points)
+        if not points:
+            return cls(date.min, [], [])
+
+        first = min(day for day, _, _ in points)
+        last = max(day for day, _, _ in points)
+        sums = [0] * ((last - first).days + 1)
+        counts = [0] * len(sums)
+        for day, total, n in points:
+            i = (day - first).days
+            sums[i] += total
+            counts[i] += n
+        return cls(first, sums, counts)
+
+    @property
+    def last_day(self) -> date:
+        return self.first_day + timedelta(days=self.days - 1)
+
+    def total(self, start: date, end: date) -> tuple[int, int]:
+        """
+        (sum, count) over the days start..end inclusive, clipped to the series.
+        """
+        return self._span((start - self.first_day).days, (end - self.first_day).days + 1)
+
+    def trailing(self, end: date, days: int) -> tuple[int, int]:
+        """
+        (sum, count) over the `days` days ending on `end`, clipped to the
+        series (by day offset, so any window length is fine).
+        """
+        hi = (end - self.first_day).days + 1
+        return self._span(hi - days, hi)
+
+    def _span(self, lo: int, hi: int) -> tuple[int, int]:
+        # Days [lo, hi) as offsets from first_day, clipped to the series
+        lo, hi = max(0, lo), min(self.days, hi)
+        if hi <= lo:
+            return 0, 0
+        return self._sums[hi] - self._sums[lo], self._counts[hi] - self._counts[lo]
+
+
+# -- buckets: (label, first day, last day), clipped to [start, end] ------------
+def day_buckets(start: date, end: date):
+    day = start
+    while day <= end:
+        yield day.isoformat(), day, day
+        day += timedelta(days=1)
+
+
+def week_buckets(start: date, end: date):
+    """
+    ISO weeks (Monday to Sunday), labelled like "2024-W05".
+    """
+    monday = start - timedelta(days=start.weekday())
+    while monday <= end:
+        year, week, _ = monday.isocalendar()
+        yield f"{year}-W{week:02d}", max(start, monday), min(end, monday + timedelta(days=6))
+        monday += timedelta(days=7)
+
+
+def month_buckets(start: date, end: date):
+    """
+    Calendar months, labelled like "2024-05".
+    """
+    first = start.replace(day=1)
+    while first <= end:
+        following = (first + timedelta(days=32)).replace(day=1)
+        yield f"{first.year}-{first.month:02d}", max(start, first), min(end, following - timedelta(days=1))
+        first = following
+
+
+def period_buckets(periods, start: date, end: date):
+    """
+    Named periods (label, first day, last day), e.g. semesters: those that
+    overlap [start, end], in start order and clipped to it.
+    """
+    for label, lo, hi in sorted(periods, key=lambda p: (p[1], p[2])):
+        if lo <= end and hi >= start:
+            yield label, max(start, lo), min(end, hi)
+
+
+CALENDAR_BUCKETS = {
+    "day": day_buckets,
+    "week": week_buckets,
+    "month": month_buckets,
+}